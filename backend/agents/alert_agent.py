@@ -2,11 +2,10 @@
 Alert Agent - Detects risks and generates notifications for farmers.
 """
 import random
+from collections import Counter
 from typing import Dict, Any, List
 from datetime import datetime, timedelta
 from .base_agent import BaseAgent
-import sys
-sys.path.append('..')
 from config import config
 
 class AlertAgent(BaseAgent):
@@ -37,6 +36,10 @@ class AlertAgent(BaseAgent):
         }
     }
     
+    # Pest/disease window flattened to scalars for the per-request check
+    _PEST_HUM_LO, _PEST_HUM_HI = THRESHOLDS["pest_disease"]["humidity_range"]
+    _PEST_TEMP_LO, _PEST_TEMP_HI = THRESHOLDS["pest_disease"]["temperature_range"]
+    
     # Alert severity levels
     SEVERITY_COLORS = {
         "critical": "#FF0000",
@@ -45,6 +48,108 @@ class AlertAgent(BaseAgent):
         "low": "#00CC00"
     }
     
+    # Static fields of each active alert type; detectors add the dynamic ones
+    ALERT_TEMPLATES = {
+        "drought_risk": {
+            "type": "drought_risk",
+            "title": "Drought Conditions Developing",
+            "affected_component": "water_supply",
+            "recommended_action": "Initiate supplemental irrigation immediately"
+        },
+        "low_soil_moisture": {
+            "type": "low_soil_moisture",
+            "title": "Critically Low Soil Moisture",
+            "affected_component": "soil",
+            "recommended_action": "Apply mulching and irrigate during early morning or evening"
+        },
+        "flood_risk": {
+            "type": "flood_risk",
+            "severity": "critical",
+            "title": "Heavy Rainfall - Flood Risk",
+            "affected_component": "field",
+            "recommended_action": "Clear drainage channels, move equipment to higher ground"
+        },
+        "waterlogging_risk": {
+            "type": "waterlogging_risk",
+            "severity": "medium",
+            "title": "Waterlogging Possible",
+            "affected_component": "field",
+            "recommended_action": "Ensure proper drainage in fields"
+        },
+        "excess_moisture": {
+            "type": "excess_moisture",
+            "severity": "medium",
+            "title": "Excess Soil Moisture",
+            "affected_component": "soil",
+            "recommended_action": "Avoid irrigation, improve field drainage"
+        },
+        "heat_wave": {
+            "type": "heat_wave",
+            "severity": "critical",
+            "title": "Extreme Heat Warning",
+            "affected_component": "crop",
+            "recommended_action": "Provide shade, increase irrigation frequency, spray water on leaves"
+        },
+        "heat_stress": {
+            "type": "heat_stress",
+            "severity": "high",
+            "title": "High Temperature Alert",
+            "affected_component": "crop",
+            "recommended_action": "Monitor crops closely, consider mulching"
+        },
+        "cold_wave": {
+            "type": "cold_wave",
+            "severity": "critical",
+            "title": "Frost/Cold Wave Warning",
+            "affected_component": "crop",
+            "recommended_action": "Cover sensitive crops, use smoke/fire for frost protection"
+        },
+        "disease_risk": {
+            "type": "disease_risk",
+            "severity": "medium",
+            "affected_component": "crop"
+        },
+        "crop_stress": {
+            "type": "crop_stress",
+            "severity": "high",
+            "title": "Crop Stress Detected",
+            "message": "Satellite imagery indicates significant stress in crop canopy.",
+            "affected_component": "crop",
+            "recommended_action": "Conduct field inspection to identify cause of stress"
+        }
+    }
+    
+    # Crop-specific diseases to watch for under favorable conditions. The
+    # disease lists are tuples, since every alert payload shares them
+    CROP_DISEASES = {
+        "Rice": {
+            "diseases": ("Blast", "Brown Leaf Spot", "Bacterial Leaf Blight"),
+            "prevention": "Apply fungicide spray (Tricyclazole/Carbendazim)"
+        },
+        "Wheat": {
+            "diseases": ("Rust", "Karnal Bunt", "Powdery Mildew"),
+            "prevention": "Monitor for rust, apply Propiconazole if detected"
+        },
+        "Cotton": {
+            "diseases": ("Boll Rot", "Wilt", "Grey Mildew"),
+            "prevention": "Maintain field hygiene, apply appropriate fungicides"
+        },
+        "Sugarcane": {
+            "diseases": ("Red Rot", "Smut", "Leaf Scald"),
+            "prevention": "Use healthy seed material, remove infected plants"
+        }
+    }
+    DEFAULT_DISEASE_INFO = {
+        "diseases": ("Various fungal diseases",),
+        "prevention": "Apply preventive fungicide spray"
+    }
+    
+    # Forecast horizon (hours ahead) covered by advance alerts, one entry per day
+    ADVANCE_ALERT_HOURS = (24, 48)
+    
+    # Sort order for alert severities (unknown severities sort last)
+    SEVERITY_ORDER = {"critical": 0, "high": 1, "medium": 2, "low": 3}
+    
     def __init__(self):
         super().__init__("AlertAgent")
         self.active_alerts = []
@@ -69,7 +174,7 @@ class AlertAgent(BaseAgent):
         Returns:
             Alert data including active alerts and 24-48hr forecasts
         """
-        self.log_activity(f"Analyzing risks for {task.get('state', 'Unknown')}")
+        self.log_activity("Analyzing risks for %s", task.get('state', 'Unknown'))
         self._record_execution()
         
         state = task.get("state", "Maharashtra")
@@ -78,29 +183,38 @@ class AlertAgent(BaseAgent):
         soil_data = task.get("soil_data", {})
         satellite_data = task.get("satellite_data", {})
         
+        # Compute the clock once and share the alert expiry timestamps
+        now = datetime.now()
+        valid_until = {hours: self._iso_in(now, hours) for hours in (24, 36, 48, 72)}
+        
         # Detect all types of risks
         alerts = []
-        alerts.extend(self._detect_drought_risk(weather_data, soil_data))
-        alerts.extend(self._detect_flood_risk(weather_data, soil_data))
-        alerts.extend(self._detect_temperature_extremes(weather_data))
-        alerts.extend(self._detect_pest_disease_risk(weather_data, soil_data, satellite_data, crop))
+        alerts.extend(self._detect_drought_risk(weather_data, soil_data, valid_until))
+        alerts.extend(self._detect_flood_risk(weather_data, soil_data, valid_until))
+        alerts.extend(self._detect_temperature_extremes(weather_data, valid_until))
+        alerts.extend(self._detect_pest_disease_risk(weather_data, soil_data, satellite_data, crop, valid_until))
         
         # Generate advance alerts (24-48 hours)
         advance_alerts = self._generate_advance_alerts(weather_data, state)
         
         # Prioritize and sort alerts
         sorted_alerts = self._prioritize_alerts(alerts)
+        severity_counts = Counter(a.get("severity", "low") for a in sorted_alerts)
         
         return {
             "active_alerts": sorted_alerts,
             "alert_count": len(sorted_alerts),
             "advance_alerts": advance_alerts,
-            "risk_summary": self._generate_risk_summary(sorted_alerts, advance_alerts),
-            "notification_recommendations": self._generate_notification_recommendations(sorted_alerts),
-            "timestamp": datetime.now().isoformat()
+            "risk_summary": self._generate_risk_summary(sorted_alerts, advance_alerts, severity_counts),
+            "notification_recommendations": self._generate_notification_recommendations(severity_counts),
+            "timestamp": now.isoformat()
         }
     
-    def _detect_drought_risk(self, weather: Dict, soil: Dict) -> List[Dict]:
+    def _iso_in(self, now: datetime, hours: int) -> str:
+        """Return the ISO timestamp `hours` after `now`."""
+        return (now + timedelta(hours=hours)).isoformat()
+    
+    def _detect_drought_risk(self, weather: Dict, soil: Dict, valid_until: Dict[int, str]) -> List[Dict]:
         """Detect drought risk conditions."""
         alerts = []
         
@@ -110,30 +224,24 @@ class AlertAgent(BaseAgent):
         if rainfall < self.THRESHOLDS["drought"]["rainfall_24h_min"]:
             severity = "high" if rainfall < 2 else "medium"
             alerts.append({
-                "type": "drought_risk",
+                **self.ALERT_TEMPLATES["drought_risk"],
                 "severity": severity,
-                "title": "Drought Conditions Developing",
                 "message": f"Very low rainfall ({rainfall}mm in 24h). Consider irrigation.",
-                "affected_component": "water_supply",
-                "recommended_action": "Initiate supplemental irrigation immediately",
-                "valid_until": (datetime.now() + timedelta(hours=48)).isoformat()
+                "valid_until": valid_until[48]
             })
         
         if moisture < self.THRESHOLDS["drought"]["soil_moisture_min"]:
             severity = "high" if moisture < 20 else "medium"
             alerts.append({
-                "type": "low_soil_moisture",
+                **self.ALERT_TEMPLATES["low_soil_moisture"],
                 "severity": severity,
-                "title": "Critically Low Soil Moisture",
                 "message": f"Soil moisture at {moisture}%, crops may experience water stress.",
-                "affected_component": "soil",
-                "recommended_action": "Apply mulching and irrigate during early morning or evening",
-                "valid_until": (datetime.now() + timedelta(hours=24)).isoformat()
+                "valid_until": valid_until[24]
             })
         
         return alerts
     
-    def _detect_flood_risk(self, weather: Dict, soil: Dict) -> List[Dict]:
+    def _detect_flood_risk(self, weather: Dict, soil: Dict, valid_until: Dict[int, str]) -> List[Dict]:
         """Detect flood/waterlogging risk."""
         alerts = []
         
@@ -142,39 +250,27 @@ class AlertAgent(BaseAgent):
         
         if rainfall > self.THRESHOLDS["flood"]["rainfall_24h_max"]:
             alerts.append({
-                "type": "flood_risk",
-                "severity": "critical",
-                "title": "Heavy Rainfall - Flood Risk",
+                **self.ALERT_TEMPLATES["flood_risk"],
                 "message": f"Extreme rainfall ({rainfall}mm). High risk of waterlogging and flooding.",
-                "affected_component": "field",
-                "recommended_action": "Clear drainage channels, move equipment to higher ground",
-                "valid_until": (datetime.now() + timedelta(hours=24)).isoformat()
+                "valid_until": valid_until[24]
             })
         elif rainfall > 70:
             alerts.append({
-                "type": "waterlogging_risk",
-                "severity": "medium",
-                "title": "Waterlogging Possible",
+                **self.ALERT_TEMPLATES["waterlogging_risk"],
                 "message": f"Heavy rainfall ({rainfall}mm) may cause waterlogging in low-lying areas.",
-                "affected_component": "field",
-                "recommended_action": "Ensure proper drainage in fields",
-                "valid_until": (datetime.now() + timedelta(hours=36)).isoformat()
+                "valid_until": valid_until[36]
             })
         
         if moisture > self.THRESHOLDS["flood"]["soil_moisture_max"]:
             alerts.append({
-                "type": "excess_moisture",
-                "severity": "medium",
-                "title": "Excess Soil Moisture",
+                **self.ALERT_TEMPLATES["excess_moisture"],
                 "message": f"Soil moisture very high ({moisture}%). Risk of root rot and disease.",
-                "affected_component": "soil",
-                "recommended_action": "Avoid irrigation, improve field drainage",
-                "valid_until": (datetime.now() + timedelta(hours=48)).isoformat()
+                "valid_until": valid_until[48]
             })
         
         return alerts
     
-    def _detect_temperature_extremes(self, weather: Dict) -> List[Dict]:
+    def _detect_temperature_extremes(self, weather: Dict, valid_until: Dict[int, str]) -> List[Dict]:
         """Detect heat wave and cold wave conditions."""
         alerts = []
         
@@ -183,39 +279,28 @@ class AlertAgent(BaseAgent):
         
         if temp > self.THRESHOLDS["heat_wave"]["temperature_max"]:
             alerts.append({
-                "type": "heat_wave",
-                "severity": "critical",
-                "title": "Extreme Heat Warning",
+                **self.ALERT_TEMPLATES["heat_wave"],
                 "message": f"Temperature at {temp}°C. Crops under severe heat stress.",
-                "affected_component": "crop",
-                "recommended_action": "Provide shade, increase irrigation frequency, spray water on leaves",
-                "valid_until": (datetime.now() + timedelta(hours=24)).isoformat()
+                "valid_until": valid_until[24]
             })
         elif temp > 38:
             alerts.append({
-                "type": "heat_stress",
-                "severity": "high",
-                "title": "High Temperature Alert",
+                **self.ALERT_TEMPLATES["heat_stress"],
                 "message": f"Temperature at {temp}°C. Crops may experience heat stress.",
-                "affected_component": "crop",
-                "recommended_action": "Monitor crops closely, consider mulching",
-                "valid_until": (datetime.now() + timedelta(hours=24)).isoformat()
+                "valid_until": valid_until[24]
             })
         
         if temp < self.THRESHOLDS["cold_wave"]["temperature_min"]:
             alerts.append({
-                "type": "cold_wave",
-                "severity": "critical",
-                "title": "Frost/Cold Wave Warning",
+                **self.ALERT_TEMPLATES["cold_wave"],
                 "message": f"Temperature dropped to {temp}°C. Risk of frost damage.",
-                "affected_component": "crop",
-                "recommended_action": "Cover sensitive crops, use smoke/fire for frost protection",
-                "valid_until": (datetime.now() + timedelta(hours=24)).isoformat()
+                "valid_until": valid_until[24]
             })
         
         return alerts
     
-    def _detect_pest_disease_risk(self, weather: Dict, soil: Dict, satellite: Dict, crop: str) -> List[Dict]:
+    def _detect_pest_disease_risk(self, weather: Dict, soil: Dict, satellite: Dict, crop: str,
+                                  valid_until: Dict[int, str]) -> List[Dict]:
         """Detect conditions favorable for pest and disease outbreak."""
         alerts = []
         
@@ -223,65 +308,35 @@ class AlertAgent(BaseAgent):
         temp = current.get("temperature", 25)
         humidity = current.get("humidity", 60)
         
-        thresh = self.THRESHOLDS["pest_disease"]
-        
         # High humidity + warm temperature = disease risk
-        if (thresh["humidity_range"][0] <= humidity <= thresh["humidity_range"][1] and
-            thresh["temperature_range"][0] <= temp <= thresh["temperature_range"][1]):
+        if (self._PEST_HUM_LO <= humidity <= self._PEST_HUM_HI and
+            self._PEST_TEMP_LO <= temp <= self._PEST_TEMP_HI):
             
             # Crop-specific diseases
             disease_info = self._get_crop_disease_info(crop)
             
             alerts.append({
-                "type": "disease_risk",
-                "severity": "medium",
+                **self.ALERT_TEMPLATES["disease_risk"],
                 "title": f"Disease Risk Alert for {crop}",
                 "message": f"Humidity ({humidity}%) and temperature ({temp}°C) favor disease development.",
-                "affected_component": "crop",
                 "diseases_at_risk": disease_info["diseases"],
                 "recommended_action": disease_info["prevention"],
-                "valid_until": (datetime.now() + timedelta(hours=48)).isoformat()
+                "valid_until": valid_until[48]
             })
         
         # Check satellite stress data
         stress = satellite.get("stress_analysis", {})
         if stress.get("overall_stress_level") == "high":
             alerts.append({
-                "type": "crop_stress",
-                "severity": "high",
-                "title": "Crop Stress Detected",
-                "message": "Satellite imagery indicates significant stress in crop canopy.",
-                "affected_component": "crop",
-                "recommended_action": "Conduct field inspection to identify cause of stress",
-                "valid_until": (datetime.now() + timedelta(hours=72)).isoformat()
+                **self.ALERT_TEMPLATES["crop_stress"],
+                "valid_until": valid_until[72]
             })
         
         return alerts
     
     def _get_crop_disease_info(self, crop: str) -> Dict[str, Any]:
         """Get crop-specific disease information."""
-        diseases = {
-            "Rice": {
-                "diseases": ["Blast", "Brown Leaf Spot", "Bacterial Leaf Blight"],
-                "prevention": "Apply fungicide spray (Tricyclazole/Carbendazim)"
-            },
-            "Wheat": {
-                "diseases": ["Rust", "Karnal Bunt", "Powdery Mildew"],
-                "prevention": "Monitor for rust, apply Propiconazole if detected"
-            },
-            "Cotton": {
-                "diseases": ["Boll Rot", "Wilt", "Grey Mildew"],
-                "prevention": "Maintain field hygiene, apply appropriate fungicides"
-            },
-            "Sugarcane": {
-                "diseases": ["Red Rot", "Smut", "Leaf Scald"],
-                "prevention": "Use healthy seed material, remove infected plants"
-            }
-        }
-        return diseases.get(crop, {
-            "diseases": ["Various fungal diseases"],
-            "prevention": "Apply preventive fungicide spray"
-        })
+        return self.CROP_DISEASES.get(crop, self.DEFAULT_DISEASE_INFO)
     
     def _generate_advance_alerts(self, weather: Dict, state: str) -> List[Dict]:
         """Generate 24-48 hour advance alerts based on forecast."""
@@ -289,9 +344,8 @@ class AlertAgent(BaseAgent):
         
         forecast = weather.get("forecast", [])
         
-        for i, day in enumerate(forecast[:2]):  # Next 2 days
-            hours_ahead = (i + 1) * 24
-            
+        # zip() stops at the shorter side, covering only the next 2 days
+        for hours_ahead, day in zip(self.ADVANCE_ALERT_HOURS, forecast):
             rain_prob = day.get("rain_probability", 0)
             temp = day.get("temperature", 25)
             
@@ -319,14 +373,14 @@ class AlertAgent(BaseAgent):
     
     def _prioritize_alerts(self, alerts: List[Dict]) -> List[Dict]:
         """Sort alerts by severity and recency."""
-        severity_order = {"critical": 0, "high": 1, "medium": 2, "low": 3}
-        
-        return sorted(alerts, key=lambda x: severity_order.get(x.get("severity", "low"), 4))
+        severity_order = self.SEVERITY_ORDER.get
+        return sorted(alerts, key=lambda x: severity_order(x.get("severity", "low"), 4))
     
-    def _generate_risk_summary(self, alerts: List[Dict], advance_alerts: List[Dict]) -> Dict[str, Any]:
+    def _generate_risk_summary(self, alerts: List[Dict], advance_alerts: List[Dict],
+                               severity_counts: Counter) -> Dict[str, Any]:
         """Generate overall risk summary."""
-        critical_count = sum(1 for a in alerts if a.get("severity") == "critical")
-        high_count = sum(1 for a in alerts if a.get("severity") == "high")
+        critical_count = severity_counts["critical"]
+        high_count = severity_counts["high"]
         
         if critical_count > 0:
             overall = "critical"
@@ -350,11 +404,12 @@ class AlertAgent(BaseAgent):
             "high_alerts": high_count
         }
     
-    def _generate_notification_recommendations(self, alerts: List[Dict]) -> List[Dict]:
+    def _generate_notification_recommendations(self, severity_counts: Counter) -> List[Dict]:
         """Generate notification recommendations for farmer."""
         recommendations = []
+        has_critical = severity_counts["critical"] > 0
         
-        if any(a.get("severity") == "critical" for a in alerts):
+        if has_critical:
             recommendations.append({
                 "channel": "SMS",
                 "priority": "immediate",
@@ -366,7 +421,7 @@ class AlertAgent(BaseAgent):
                 "message": "Consider automated voice call for critical alert"
             })
         
-        if any(a.get("severity") in ["high", "critical"] for a in alerts):
+        if has_critical or severity_counts["high"] > 0:
             recommendations.append({
                 "channel": "App Notification",
                 "priority": "high",
@@ -2,6 +2,7 @@
 Manager Agent - Orchestrates all sub-agents and manages parallel execution.
 """
 import asyncio
+import re
 from typing import Dict, Any, List, Optional
 from datetime import datetime
 from .base_agent import BaseAgent
@@ -11,8 +12,6 @@ from .satellite_agent import SatelliteAgent
 from .prediction_agent import PredictionAgent
 from .alert_agent import AlertAgent
 from .response_agent import ResponseAgent
-import sys
-sys.path.append('..')
 from config import config
 
 class ManagerAgent(BaseAgent):
@@ -26,6 +25,14 @@ class ManagerAgent(BaseAgent):
     4. Aggregates results and returns final response
     """
     
+    # Query keywords per intent, checked in priority order
+    INTENT_KEYWORDS = [
+        ("weather_info", ["weather", "rain", "temperature", "मौसम", "बारिश"]),
+        ("soil_info", ["soil", "fertilizer", "मिट्टी", "उर्वरक"]),
+        ("health_check", ["health", "disease", "pest", "रोग", "कीट"]),
+        ("irrigation_advice", ["irrigation", "water", "सिंचाई", "पानी"]),
+    ]
+    
     def __init__(self):
         super().__init__("ManagerAgent")
         
@@ -46,6 +53,26 @@ class ManagerAgent(BaseAgent):
             "alert": self.alert_agent,
             "response": self.response_agent
         }
+        
+        # Keyword patterns for query parsing. Alternatives are ordered
+        # longest-first so the most specific name wins at a given position;
+        # the maps recover the canonical spelling from the lower-cased match.
+        all_crops = dict.fromkeys(
+            c for s_data in config.INDIAN_STATES.values() for c in s_data.get("crops", [])
+        )
+        self._state_names = {s.lower(): s for s in config.INDIAN_STATES.keys()}
+        self._crop_names = {c.lower(): c for c in all_crops}
+        self._state_pattern = self._compile_names(self._state_names)
+        self._crop_pattern = self._compile_names(self._crop_names)
+        self._intent_patterns = [
+            (intent, re.compile("|".join(map(re.escape, words))))
+            for intent, words in self.INTENT_KEYWORDS
+        ]
+    
+    async def aclose(self):
+        """Release resources held by sub-agents (pooled HTTP and Redis connections)."""
+        await self.weather_agent.aclose()
+        await self.prediction_agent.aclose()
     
     def get_capabilities(self) -> list:
         return [
@@ -66,7 +93,7 @@ class ManagerAgent(BaseAgent):
         Returns:
             Complete response with all agent data aggregated
         """
-        self.log_activity(f"Starting orchestration for query: {task.get('query', '')[:50]}...")
+        self.log_activity("Starting orchestration for query: %s...", task.get('query', '')[:50])
         self._record_execution()
         
         start_time = datetime.now()
@@ -79,76 +106,55 @@ class ManagerAgent(BaseAgent):
             crop = task.get("crop") or parsed.get("crop", "Rice")
             language = task.get("language", "en")
             
-            self.log_activity(f"Parsed: State={state}, Crop={crop}, Language={language}")
+            self.log_activity("Parsed: State=%s, Crop=%s, Language=%s", state, crop, language)
             
             # Get coordinates
             state_info = config.INDIAN_STATES.get(state, config.INDIAN_STATES["Maharashtra"])
             lat = state_info["lat"]
             lon = state_info["lon"]
             
-            # Step 2: Execute data-fetching agents in parallel
-            data_task = {
+            # Shared task context, filled in as each phase completes.
+            # Agents read it with .get() so extra keys are harmless.
+            ctx = {
+                "query": task.get("query", ""),
+                "language": language,
                 "state": state,
                 "crop": crop,
                 "lat": lat,
                 "lon": lon
             }
             
+            # Step 2: Execute data-fetching agents in parallel
             self.log_activity("Phase 1: Fetching data from Weather, Soil, and Satellite agents...")
             
-            weather_data, soil_data, satellite_data = await asyncio.gather(
-                self.weather_agent.execute(data_task),
-                self.soil_agent.execute(data_task),
-                self.satellite_agent.execute(data_task)
+            weather_data, soil_data, satellite_data = await self._run_parallel(
+                self.weather_agent.execute(ctx),
+                self.soil_agent.execute(ctx),
+                self.satellite_agent.execute(ctx)
             )
+            ctx["weather_data"] = weather_data
+            ctx["soil_data"] = soil_data
+            ctx["satellite_data"] = satellite_data
             
             self.log_activity("Phase 1 complete. Starting Phase 2...")
             
-            # Step 3: Run prediction agent with combined data
-            prediction_task = {
-                "state": state,
-                "crop": crop,
-                "weather_data": weather_data,
-                "soil_data": soil_data,
-                "satellite_data": satellite_data
-            }
-            
-            prediction_data = await self.prediction_agent.execute(prediction_task)
-            
-            self.log_activity("Prediction complete. Checking alerts...")
-            
-            # Step 4: Run alert agent
-            alert_task = {
-                "state": state,
-                "crop": crop,
-                "weather_data": weather_data,
-                "soil_data": soil_data,
-                "satellite_data": satellite_data
-            }
-            
-            alert_data = await self.alert_agent.execute(alert_task)
-            
-            self.log_activity("Alerts processed. Formatting response...")
+            # Step 3: Run prediction and alert agents in parallel on the combined data
+            prediction_data, alert_data = await self._run_parallel(
+                self.prediction_agent.execute(ctx),
+                self.alert_agent.execute(ctx)
+            )
+            ctx["prediction_data"] = prediction_data
+            ctx["alert_data"] = alert_data
             
-            # Step 5: Format the final response
-            response_task = {
-                "query": task.get("query", ""),
-                "language": language,
-                "state": state,
-                "crop": crop,
-                "weather_data": weather_data,
-                "soil_data": soil_data,
-                "satellite_data": satellite_data,
-                "prediction_data": prediction_data,
-                "alert_data": alert_data
-            }
+            self.log_activity("Prediction and alerts complete. Formatting response...")
             
-            formatted_response = await self.response_agent.execute(response_task)
+            # Step 4: Format the final response
+            formatted_response = await self.response_agent.execute(ctx)
             
             end_time = datetime.now()
             execution_time = (end_time - start_time).total_seconds()
             
-            self.log_activity(f"Orchestration complete in {execution_time:.2f}s")
+            self.log_activity("Orchestration complete in %.2fs", execution_time)
             
             # Return complete result
             return {
@@ -179,14 +185,37 @@ class ManagerAgent(BaseAgent):
             }
             
         except Exception as e:
-            self.log_activity(f"Error during orchestration: {str(e)}", "error")
+            # asyncio.CancelledError is a BaseException and is not caught here
+            self.log_activity("Error during orchestration: %s", e, level="exception")
             return {
                 "success": False,
                 "error": str(e),
                 "query": task.get("query", ""),
-                "timestamp": datetime.now().isoformat()
+                "timestamp": start_time.isoformat()
             }
     
+    def _compile_names(self, names: Dict[str, str]) -> re.Pattern:
+        """Compile lower-cased names into one longest-first regex alternation."""
+        return re.compile("|".join(map(re.escape, sorted(names, key=len, reverse=True))))
+    
+    async def _run_parallel(self, *coros) -> List[Any]:
+        """
+        Run agent coroutines concurrently and return their results in order.
+        
+        Uses asyncio.TaskGroup where available (Python 3.11+) so the
+        remaining agents are cancelled as soon as one fails; the first
+        failure is re-raised unwrapped to keep the error message readable.
+        """
+        if not hasattr(asyncio, "TaskGroup"):
+            return await asyncio.gather(*coros)
+        
+        try:
+            async with asyncio.TaskGroup() as tg:
+                tasks = [tg.create_task(coro) for coro in coros]
+        except ExceptionGroup as eg:
+            raise eg.exceptions[0]
+        return [t.result() for t in tasks]
+    
     def _parse_query(self, query: str) -> Dict[str, Any]:
         """
         Parse the user query to extract state, crop, and intent.
@@ -195,34 +224,18 @@ class ManagerAgent(BaseAgent):
         """
         query_lower = query.lower()
         
-        # Extract state
-        state = None
-        for s in config.INDIAN_STATES.keys():
-            if s.lower() in query_lower:
-                state = s
-                break
-        
-        # Extract crop
-        crop = None
-        all_crops = set()
-        for s_data in config.INDIAN_STATES.values():
-            all_crops.update(s_data.get("crops", []))
-        
-        for c in all_crops:
-            if c.lower() in query_lower:
-                crop = c
-                break
+        # Extract state and crop
+        state_match = self._state_pattern.search(query_lower)
+        state = self._state_names[state_match.group(0)] if state_match else None
+        crop_match = self._crop_pattern.search(query_lower)
+        crop = self._crop_names[crop_match.group(0)] if crop_match else None
         
         # Determine intent
         intent = "yield_prediction"  # Default
-        if any(word in query_lower for word in ["weather", "rain", "temperature", "मौसम", "बारिश"]):
-            intent = "weather_info"
-        elif any(word in query_lower for word in ["soil", "fertilizer", "मिट्टी", "उर्वरक"]):
-            intent = "soil_info"
-        elif any(word in query_lower for word in ["health", "disease", "pest", "रोग", "कीट"]):
-            intent = "health_check"
-        elif any(word in query_lower for word in ["irrigation", "water", "सिंचाई", "पानी"]):
-            intent = "irrigation_advice"
+        for candidate, pattern in self._intent_patterns:
+            if pattern.search(query_lower):
+                intent = candidate
+                break
         
         return {
             "state": state,
@@ -1,15 +1,297 @@
 """
 Prediction Agent - ML-based yield prediction combining data from all agents.
 """
-import random
+import asyncio
+import hashlib
+import json
 import math
-from typing import Dict, Any, Optional
+import os
+import time
+from bisect import bisect_right
+from collections import OrderedDict
+from typing import Dict, Any, NamedTuple, Optional, Sequence, Tuple
 from datetime import datetime
-from .base_agent import BaseAgent
-import sys
-sys.path.append('..')
+import numpy as np
+from .base_agent import BaseAgent, coarse_timestamp
 from config import config
 
+try:
+    import numba
+    _NUMBA_AVAILABLE = True
+except ImportError:  # Optional accelerator; plain Python is used without it
+    numba = None
+    _NUMBA_AVAILABLE = False
+
+try:
+    import redis.asyncio as aioredis
+except ImportError:  # Optional shared cache; only the local caches are used without it
+    aioredis = None
+
+# Random source shared by the per-request and batch paths
+_rng = np.random.default_rng()
+
+# Read-only default for nested `.get` lookups, so misses don't allocate
+_EMPTY: Dict[str, Any] = {}
+
+
+class _JitterBuffer:
+    """
+    Pre-drawn uniform [0, 1) samples, refilled from `_rng` in bulk.
+    
+    Drawing thousands of values in one NumPy call is far cheaper than one
+    `random.uniform` call per jitter term on the per-request path.
+    """
+    __slots__ = ("_values", "_index")
+    
+    SIZE = 8192
+    
+    def __init__(self):
+        self._refill()
+    
+    def _refill(self):
+        self._values = _rng.random(self.SIZE).tolist()
+        self._index = 0
+    
+    def _next(self) -> float:
+        if self._index >= self.SIZE:
+            self._refill()
+        value = self._values[self._index]
+        self._index += 1
+        return value
+    
+    def uniform(self, low: float, high: float) -> float:
+        """Uniform float in [low, high)."""
+        return low + (high - low) * self._next()
+    
+    def randint(self, low: int, high: int) -> int:
+        """Uniform integer in [low, high], like `random.randint`."""
+        return low + int((high - low + 1) * self._next())
+
+
+_jitter = _JitterBuffer()
+
+
+def _njit(signature: str):
+    """Compile a scoring kernel with numba.njit when numba is installed."""
+    if not _NUMBA_AVAILABLE:
+        return lambda func: func
+    return numba.njit(signature, cache=True)
+
+
+@_njit("float64(float64)")
+def _clamp_score(score):
+    """Clamp a factor score to [0.3, 1.0] with plain comparisons."""
+    if score < 0.3:
+        return 0.3
+    if score > 1.0:
+        return 1.0
+    return score
+
+
+@_njit("float64(float64, float64, float64, float64, boolean, int64, int64)")
+def _weather_score_kernel(temp, rainfall, opt_low, opt_high, water_loving,
+                          alert_high, alert_medium):
+    """Weather favorability (0.3-1) from already-extracted scalar inputs."""
+    score = 1.0
+    
+    # Temperature impact
+    if temp < opt_low:
+        score -= (opt_low - temp) * 0.02
+    elif temp > opt_high:
+        score -= (temp - opt_high) * 0.02
+    
+    # Rainfall impact
+    if rainfall > 100:  # Excess rain
+        score -= 0.15
+    elif rainfall < 5 and water_loving:  # Too dry for water-loving crops
+        score -= 0.2
+    
+    # Weather alerts impact
+    score -= alert_high * 0.15 + alert_medium * 0.08
+    
+    return _clamp_score(score)
+
+
+@_njit("float64(float64, boolean, boolean, boolean)")
+def _soil_score_kernel(health_score, moisture_low, moisture_high, ph_off):
+    """Soil health (0.3-1) from already-extracted scalar inputs."""
+    score = health_score / 100
+    
+    # Moisture adjustment
+    if moisture_low:
+        score -= 0.15
+    elif moisture_high:
+        score -= 0.08
+    
+    # pH adjustment
+    if ph_off:
+        score -= 0.1
+    
+    return _clamp_score(score)
+
+
+@_njit("float64(float64, boolean, boolean, boolean)")
+def _satellite_score_kernel(health_score, ndvi_below, stress_high, stress_medium):
+    """Crop health (0.3-1) from already-extracted scalar satellite inputs."""
+    score = health_score / 100
+    
+    # NDVI status adjustment
+    if ndvi_below:
+        score -= 0.1
+    
+    # Stress adjustment
+    if stress_high:
+        score -= 0.15
+    elif stress_medium:
+        score -= 0.08
+    
+    return _clamp_score(score)
+
+
+def _batch_factor_scores_numpy(temp, rainfall, opt_low, opt_high, water_loving,
+                               alert_high, alert_medium, has_weather,
+                               soil_health, moisture_low, moisture_high, ph_off, has_soil,
+                               sat_health, ndvi_below, stress_high, stress_medium, has_satellite):
+    """
+    Weather, soil and satellite scores for a batch of column inputs.
+    
+    Array counterpart of the scalar kernels; rows without data get 0.7.
+    """
+    weather_score = (
+        1.0
+        - np.maximum(opt_low - temp, 0) * 0.02
+        - np.maximum(temp - opt_high, 0) * 0.02
+        - np.where(rainfall > 100, 0.15, np.where((rainfall < 5) & water_loving, 0.2, 0.0))
+        - alert_high * 0.15
+        - alert_medium * 0.08
+    )
+    np.clip(weather_score, 0.3, 1.0, out=weather_score)
+    weather_score[~has_weather] = 0.7
+    
+    soil_score = (
+        soil_health / 100
+        - np.where(moisture_low, 0.15, np.where(moisture_high, 0.08, 0.0))
+        - np.where(ph_off, 0.1, 0.0)
+    )
+    np.clip(soil_score, 0.3, 1.0, out=soil_score)
+    soil_score[~has_soil] = 0.7
+    
+    satellite_score = (
+        sat_health / 100
+        - np.where(ndvi_below, 0.1, 0.0)
+        - np.where(stress_high, 0.15, np.where(stress_medium, 0.08, 0.0))
+    )
+    np.clip(satellite_score, 0.3, 1.0, out=satellite_score)
+    satellite_score[~has_satellite] = 0.7
+    
+    return weather_score, soil_score, satellite_score
+
+
+if _NUMBA_AVAILABLE:
+    @numba.njit(
+        "UniTuple(float64[:], 3)(float64[:], float64[:], float64[:], float64[:], boolean[:], "
+        "int64[:], int64[:], boolean[:], float64[:], boolean[:], boolean[:], boolean[:], boolean[:], "
+        "float64[:], boolean[:], boolean[:], boolean[:], boolean[:])",
+        parallel=True, cache=True
+    )
+    def _batch_factor_scores(temp, rainfall, opt_low, opt_high, water_loving,
+                             alert_high, alert_medium, has_weather,
+                             soil_health, moisture_low, moisture_high, ph_off, has_soil,
+                             sat_health, ndvi_below, stress_high, stress_medium, has_satellite):
+        """Parallel loop over rows calling the scalar scoring kernels."""
+        n = temp.shape[0]
+        weather_score = np.full(n, 0.7)
+        soil_score = np.full(n, 0.7)
+        satellite_score = np.full(n, 0.7)
+        for i in numba.prange(n):
+            if has_weather[i]:
+                weather_score[i] = _weather_score_kernel(
+                    temp[i], rainfall[i], opt_low[i], opt_high[i], water_loving[i],
+                    alert_high[i], alert_medium[i]
+                )
+            if has_soil[i]:
+                soil_score[i] = _soil_score_kernel(
+                    soil_health[i], moisture_low[i], moisture_high[i], ph_off[i]
+                )
+            if has_satellite[i]:
+                satellite_score[i] = _satellite_score_kernel(
+                    sat_health[i], ndvi_below[i], stress_high[i], stress_medium[i]
+                )
+        return weather_score, soil_score, satellite_score
+else:
+    _batch_factor_scores = _batch_factor_scores_numpy
+
+
+def _crop_array(crops, table: Dict, default, field: Optional[str] = None) -> np.ndarray:
+    """
+    Build an array indexed by crop id from a per-crop lookup table.
+    
+    The extra last row holds `default` for crops missing from the table.
+    """
+    rows = [table.get(c, default) for c in crops] + [default]
+    if field is not None:
+        rows = [r[field] for r in rows]
+    return np.array(rows, dtype=np.float64)
+
+
+class _CropProfile(NamedTuple):
+    """Every per-crop constant the per-request path needs, resolved once."""
+    yield_avg: float
+    yield_min: float
+    yield_max: float
+    yield_range: float
+    opt_low: float
+    opt_high: float
+    water_loving: bool
+    in_season: Tuple[bool, ...]  # Indexed by calendar month (index 0 unused)
+
+
+class _PredictionInputs(NamedTuple):
+    """Scalar fields read once from the agent payloads; None where a payload is empty."""
+    weather: Optional[Tuple[float, float, float, int, int]]  # temp, humidity, 24h rain, high/medium alerts
+    weather_live: bool
+    soil: Optional[Tuple[float, str, str]]  # health score, moisture status, pH status
+    satellite: Optional[Tuple[float, str, Optional[str]]]  # health score, NDVI status, stress level
+    crop_area: float
+
+
+def _crop_profiles(crops, yields: Dict, default_yield: Dict, temps: Dict, default_temp,
+                   water_loving, in_season: np.ndarray) -> Tuple[Dict[str, _CropProfile], _CropProfile]:
+    """
+    Build a profile per crop plus one for unknown crops.
+    
+    `in_season` is the (month, crop id) table; crop ids follow `crops` order
+    and its last column is the default crop.
+    """
+    seasons = in_season.T.tolist()
+    
+    def build(y: Dict, temp, water: bool, season) -> _CropProfile:
+        return _CropProfile(
+            y["avg"], y["min"], y["max"], y["max"] - y["min"],
+            temp[0], temp[1], water, tuple(season)
+        )
+    
+    profiles = {
+        crop: build(yields[crop], temps.get(crop, default_temp), crop in water_loving, seasons[i])
+        for i, crop in enumerate(crops)
+    }
+    return profiles, build(default_yield, default_temp, False, seasons[-1])
+
+
+def _in_season_table(crop_ids: Dict[str, int], seasons) -> np.ndarray:
+    """
+    Build a (13, n_crops + 1) boolean table indexed by [month, crop id].
+    
+    `seasons` is a sequence of (crops, months) pairs; row 0 is unused so
+    calendar months index directly, and the last column is the default crop.
+    """
+    table = np.zeros((13, len(crop_ids) + 1), dtype=bool)
+    for crops, months in seasons:
+        cols = [crop_ids[c] for c in crops if c in crop_ids]
+        table[np.ix_(months, cols)] = True
+    return table
+
+
 class PredictionAgent(BaseAgent):
     """Agent responsible for yield prediction and risk assessment."""
     
@@ -26,6 +308,28 @@ class PredictionAgent(BaseAgent):
         "Bajra": {"avg": 1.3, "max": 2.0, "min": 0.7},
         "Mustard": {"avg": 1.2, "max": 2.0, "min": 0.6},
     }
+    DEFAULT_YIELD = {"avg": 2.5, "max": 4.0, "min": 1.0}
+    
+    # Optimal temperature range (°C) per crop
+    OPTIMAL_TEMPS = {
+        "Rice": (25, 35),
+        "Wheat": (15, 25),
+        "Cotton": (25, 35),
+        "Sugarcane": (20, 30),
+    }
+    DEFAULT_OPTIMAL_TEMP = (20, 30)
+    
+    # Crops that suffer when rainfall is very low
+    WATER_LOVING_CROPS = frozenset({"Rice", "Sugarcane"})
+    
+    # Crop seasonality
+    KHARIF_CROPS = frozenset({"Rice", "Cotton", "Soybean", "Maize", "Groundnut"})
+    KHARIF_MONTHS = [7, 8, 9, 10]
+    RABI_CROPS = frozenset({"Wheat", "Gram", "Mustard"})
+    RABI_MONTHS = [12, 1, 2, 3]
+    
+    # Soil pH statuses that count against the soil score
+    PH_IMBALANCED = frozenset({"acidic", "alkaline"})
     
     # Risk factor weights
     RISK_WEIGHTS = {
@@ -36,8 +340,144 @@ class PredictionAgent(BaseAgent):
         "season": 0.15
     }
     
+    # Score buckets: a score at or above the i-th threshold gets the label i+1
+    RISK_LEVEL_THRESHOLDS = (20, 40, 60, 80)
+    RISK_LEVELS = ("low", "moderate", "elevated", "high", "critical")
+    CONFIDENCE_LEVEL_THRESHOLDS = (55, 70, 85)
+    CONFIDENCE_LEVELS = ("low", "moderate", "high", "very_high")
+    OUTLOOK_THRESHOLDS = (0.35, 0.5, 0.65, 0.8)
+    OUTLOOK_TEMPLATES = (
+        "Poor outlook for {crop}. Significant challenges detected. Consider consulting agricultural experts.",
+        "Concerning outlook for {crop}. Multiple factors are unfavorable. Immediate corrective action advised.",
+        "Moderate outlook for {crop}. Some challenges exist that may affect yield. Close monitoring recommended.",
+        "Good outlook for {crop}. Most factors are positive, though minor issues may slightly impact yield.",
+        "Excellent outlook for {crop}. Conditions are favorable and yield is expected to exceed historical averages.",
+    )
+    
+    # Static entries shared (read-only) by every prediction that reports them
+    RISK_FACTORS = {
+        "weather": {
+            "factor": "Weather Conditions",
+            "impact": "high",
+            "description": "Unfavorable weather patterns may affect yield"
+        },
+        "soil": {
+            "factor": "Soil Health",
+            "impact": "medium",
+            "description": "Soil conditions need improvement for optimal growth"
+        },
+        "crop_health": {
+            "factor": "Crop Health",
+            "impact": "high",
+            "description": "Crop stress detected in satellite imagery"
+        },
+        "season": {
+            "factor": "Seasonal Timing",
+            "impact": "medium",
+            "description": "Current season may not be optimal for this crop"
+        }
+    }
+    NO_SIGNIFICANT_RISK = {
+        "factor": "None Significant",
+        "impact": "low",
+        "description": "All major factors are within acceptable ranges"
+    }
+    YIELD_RECOMMENDATIONS = {
+        "weather": {
+            "category": "Weather Management",
+            "priority": "high",
+            "action": "Install protective measures like shade nets or mulching",
+            "expected_impact": "Reduce weather-related stress by 20-30%"
+        },
+        "soil": {
+            "category": "Soil Improvement",
+            "priority": "high",
+            "action": "Apply recommended fertilizers and soil amendments",
+            "expected_impact": "Improve soil health score by 15-25%"
+        },
+        "crop_health": {
+            "category": "Crop Management",
+            "priority": "high",
+            "action": "Inspect fields for pest/disease and apply treatments if needed",
+            "expected_impact": "Prevent further health decline"
+        }
+    }
+    
+    # Crop-id indexed tables for the vectorized batch path; unknown crops
+    # map to the trailing default row
+    _CROP_ID = {crop: i for i, crop in enumerate(AVERAGE_YIELDS)}
+    _DEFAULT_CROP_ID = len(AVERAGE_YIELDS)
+    _YIELD_AVG = _crop_array(AVERAGE_YIELDS, AVERAGE_YIELDS, DEFAULT_YIELD, "avg")
+    _YIELD_MIN = _crop_array(AVERAGE_YIELDS, AVERAGE_YIELDS, DEFAULT_YIELD, "min")
+    _YIELD_MAX = _crop_array(AVERAGE_YIELDS, AVERAGE_YIELDS, DEFAULT_YIELD, "max")
+    _OPT_TEMP = _crop_array(AVERAGE_YIELDS, OPTIMAL_TEMPS, DEFAULT_OPTIMAL_TEMP)
+    _WATER_LOVING = np.isin(list(AVERAGE_YIELDS) + [None], list(WATER_LOVING_CROPS))
+    _IN_SEASON = _in_season_table(_CROP_ID, [(KHARIF_CROPS, KHARIF_MONTHS), (RABI_CROPS, RABI_MONTHS)])
+    
+    # Per-crop constants specialized once for the per-request path, so a
+    # prediction does a single lookup instead of one per table
+    _CROP_PROFILES, _DEFAULT_CROP_PROFILE = _crop_profiles(
+        AVERAGE_YIELDS, AVERAGE_YIELDS, DEFAULT_YIELD, OPTIMAL_TEMPS, DEFAULT_OPTIMAL_TEMP,
+        WATER_LOVING_CROPS, _IN_SEASON
+    )
+    
+    # Weights ordered as (weather, soil, crop_health, season, historical)
+    _WEIGHTS = (
+        RISK_WEIGHTS["weather"], RISK_WEIGHTS["soil"], RISK_WEIGHTS["crop_health"],
+        RISK_WEIGHTS["season"], RISK_WEIGHTS["historical"]
+    )
+    _WEIGHT_VECTOR = np.array(_WEIGHTS)
+    
+    # Row layout returned by _generate_prediction_batch. Reported (rounded)
+    # values stay float64 so they convert back to the same decimals; the
+    # 0-1 factor scores and the 50-95 confidence are stored narrow.
+    BATCH_DTYPE = np.dtype([
+        ("predicted_yield", np.float64),
+        ("risk_score", np.float64),
+        ("confidence", np.int16),
+        ("risk_level", "U8"),
+        ("confidence_level", "U9"),
+        ("production", np.float64),
+        ("weather_score", np.float32),
+        ("soil_score", np.float32),
+        ("satellite_score", np.float32),
+        ("seasonal_score", np.float32),
+        ("combined_score", np.float32),
+    ])
+    
+    # Maximum number of memoized predictions kept (least recently used evicted)
+    PREDICTION_CACHE_SIZE = 4096
+    
+    # On-disk memo (enabled by config.PREDICTION_CACHE_DIR); bump the version
+    # whenever the prediction model changes so stale entries are ignored
+    DISK_CACHE_VERSION = 1
+    DISK_CACHE_TTL = 86400  # seconds
+    
+    # Key prefix for predictions shared between workers (config.REDIS_URL);
+    # entries expire after DISK_CACHE_TTL like the on-disk memo
+    SHARED_CACHE_PREFIX = "pred"
+    
+    __slots__ = ("_prediction_cache", "_disk_cache_dir", "_redis")
+    
     def __init__(self):
         super().__init__("PredictionAgent")
+        self._prediction_cache: OrderedDict = OrderedDict()
+        self._disk_cache_dir: Optional[str] = config.PREDICTION_CACHE_DIR or None
+        if self._disk_cache_dir:
+            os.makedirs(self._disk_cache_dir, exist_ok=True)
+        self._redis = None
+        if config.REDIS_URL:
+            if aioredis is not None:
+                self._redis = aioredis.from_url(config.REDIS_URL)
+            else:
+                self.log_activity("REDIS_URL is set but redis is not installed; "
+                                  "predictions are not shared between workers", level="warning")
+    
+    async def aclose(self):
+        """Close the shared-cache connection."""
+        if self._redis is not None:
+            await self._redis.aclose()
+            self._redis = None
     
     def get_capabilities(self) -> list:
         return [
@@ -46,7 +486,8 @@ class PredictionAgent(BaseAgent):
             "generate_confidence_interval",
             "analyze_factors",
             "compare_historical",
-            "forecast_production"
+            "forecast_production",
+            "batch_predict"
         ]
     
     async def execute(self, task: Dict[str, Any]) -> Dict[str, Any]:
@@ -59,7 +500,7 @@ class PredictionAgent(BaseAgent):
         Returns:
             Prediction results including yield forecast and risk scores
         """
-        self.log_activity(f"Generating prediction for {task.get('crop', 'Unknown')} in {task.get('state', 'Unknown')}")
+        self.log_activity("Generating prediction for %s in %s", task.get('crop', 'Unknown'), task.get('state', 'Unknown'))
         self._record_execution()
         
         state = task.get("state", "Maharashtra")
@@ -68,46 +509,202 @@ class PredictionAgent(BaseAgent):
         soil_data = task.get("soil_data", {})
         satellite_data = task.get("satellite_data", {})
         
+        month = datetime.now().month
+        inputs = self._unpack_inputs(weather_data, soil_data, satellite_data)
+        
+        # Reuse a prediction for near-identical inputs; production and the
+        # timestamp are refreshed since they are not part of the cache key
+        key = self._prediction_key(state, crop, month, inputs)
+        cached = self._prediction_cache.get(key)
+        if cached is not None:
+            self._prediction_cache.move_to_end(key)
+            return self._refresh_cached_prediction(cached, inputs.crop_area)
+        
+        # Second level: predictions made by other workers
+        digest = self._cache_digest(key)
+        if self._redis is not None:
+            cached = await self._load_shared_prediction(digest)
+            if cached is not None:
+                self._remember_prediction(key, cached)
+                return self._refresh_cached_prediction(cached, inputs.crop_area)
+        
+        # Third level: predictions persisted by earlier runs. File I/O runs
+        # in the default thread pool so a slow disk does not stall the event
+        # loop for every other request and WebSocket peer.
+        if self._disk_cache_dir:
+            cached = await asyncio.to_thread(self._load_persisted_prediction, digest)
+            if cached is not None:
+                self._remember_prediction(key, cached)
+                return self._refresh_cached_prediction(cached, inputs.crop_area)
+        
         # Generate comprehensive prediction
-        prediction = self._generate_prediction(state, crop, weather_data, soil_data, satellite_data)
+        prediction = self._generate_prediction(state, crop, month, inputs)
+        
+        if self._redis is not None:
+            await self._share_prediction(digest, prediction)
+        if self._disk_cache_dir:
+            await asyncio.to_thread(self._persist_prediction, digest, prediction)
+        self._remember_prediction(key, prediction)
         
         return prediction
     
-    def _generate_prediction(self, state: str, crop: str, weather: Dict, soil: Dict, satellite: Dict) -> Dict[str, Any]:
-        """Generate comprehensive yield prediction."""
+    def _remember_prediction(self, key: tuple, prediction: Dict[str, Any]):
+        """Store a prediction in the in-process LRU, evicting the oldest entry."""
+        self._prediction_cache[key] = prediction
+        if len(self._prediction_cache) > self.PREDICTION_CACHE_SIZE:
+            self._prediction_cache.popitem(last=False)
+    
+    def _unpack_inputs(self, weather: Dict, soil: Dict, satellite: Dict) -> _PredictionInputs:
+        """Read every field the prediction uses from the agent payloads in one pass."""
+        weather_inputs = soil_inputs = satellite_inputs = None
+        if weather:
+            current = weather.get("current", _EMPTY)
+            weather_inputs = (
+                current.get("temperature", 25),
+                current.get("humidity", 60),
+                weather.get("rainfall", _EMPTY).get("last_24h", 20),
+                *self._count_alert_severities(weather.get("alerts", ()))
+            )
+        if soil:
+            soil_inputs = (
+                soil.get("health_score", 70),
+                soil.get("moisture", _EMPTY).get("status", "optimal"),
+                soil.get("ph", _EMPTY).get("status", "optimal")
+            )
+        if satellite:
+            satellite_inputs = (
+                satellite.get("health_score", 70),
+                satellite.get("ndvi", _EMPTY).get("status", "optimal"),
+                satellite.get("stress_analysis", _EMPTY).get("overall_stress_level")
+            )
+        return _PredictionInputs(
+            weather_inputs,
+            bool(weather) and weather.get("data_source") != "simulated",
+            soil_inputs,
+            satellite_inputs,
+            satellite.get("coverage", _EMPTY).get("crop_area", 10)
+        )
+    
+    def _prediction_key(self, state: str, crop: str, month: int, inputs: _PredictionInputs) -> tuple:
+        """Build a hashable digest of the prediction inputs, with numeric values bucketed."""
+        weather, soil, satellite = inputs.weather, inputs.soil, inputs.satellite
+        return (
+            crop,
+            state,
+            month,
+            inputs.weather_live,
+            weather and (round(weather[0]), round(weather[1], -1), round(weather[2]), weather[3], weather[4]),
+            soil and (round(soil[0], -1), soil[1], soil[2]),
+            satellite and (round(satellite[0], -1), satellite[1], satellite[2])
+        )
+    
+    def _cache_digest(self, key: tuple) -> str:
+        """Stable name for a cache key, shared by the Redis and on-disk caches."""
+        return hashlib.sha256(json.dumps([self.DISK_CACHE_VERSION, key]).encode()).hexdigest()
+    
+    async def _load_shared_prediction(self, digest: str) -> Optional[Dict[str, Any]]:
+        """Read a prediction from the shared cache, or None on a miss or cache error."""
+        shared_key = f"{self.SHARED_CACHE_PREFIX}:{digest}"
+        try:
+            cached = await self._redis.get(shared_key)
+            return json.loads(cached) if cached is not None else None
+        except (aioredis.RedisError, ValueError) as e:
+            self.log_activity("Ignoring shared prediction cache entry %s: %s", shared_key, e, level="warning")
+            return None
+    
+    async def _share_prediction(self, digest: str, prediction: Dict[str, Any]):
+        """Publish a prediction to the shared cache; failures only cost other workers a recompute."""
+        shared_key = f"{self.SHARED_CACHE_PREFIX}:{digest}"
+        try:
+            await self._redis.set(shared_key, json.dumps(prediction), ex=self.DISK_CACHE_TTL)
+        except aioredis.RedisError as e:
+            self.log_activity("Could not share prediction %s: %s", shared_key, e, level="warning")
+    
+    def _disk_cache_path(self, digest: str) -> str:
+        """File holding the persisted prediction for a cache key digest."""
+        return os.path.join(self._disk_cache_dir, f"{digest}.json")
+    
+    def _load_persisted_prediction(self, digest: str) -> Optional[Dict[str, Any]]:
+        """Read a persisted prediction, or None if missing, expired or unreadable."""
+        path = self._disk_cache_path(digest)
+        try:
+            if time.time() - os.path.getmtime(path) > self.DISK_CACHE_TTL:
+                return None
+            with open(path, encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            self.log_activity("Ignoring unreadable cached prediction %s: %s", path, e, level="warning")
+            return None
+    
+    def _persist_prediction(self, digest: str, prediction: Dict[str, Any]):
+        """Write a prediction to the disk cache; failures only cost a future recompute."""
+        path = self._disk_cache_path(digest)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(prediction, f)
+            os.replace(tmp_path, path)  # Atomic, so readers never see a partial file
+        except OSError as e:
+            self.log_activity("Could not persist prediction to %s: %s", path, e, level="warning")
+    
+    def _refresh_cached_prediction(self, cached: Dict[str, Any], crop_area: float) -> Dict[str, Any]:
+        """Return a cached prediction with production and timestamp recomputed."""
+        production = round(cached["yield_prediction"]["predicted"] * crop_area, 2)
+        return {
+            **cached,
+            "production_forecast": {
+                **cached["production_forecast"],
+                "estimated_production": production,
+                "area_under_crop": crop_area
+            },
+            "timestamp": coarse_timestamp()
+        }
+    
+    def _generate_prediction(self, state: str, crop: str, month: int,
+                             inputs: _PredictionInputs) -> Dict[str, Any]:
+        """
+        Generate comprehensive yield prediction.
+        
+        The result holds only native Python numbers and strings, so it can be
+        handed straight to json/orjson. Cached copies share nested dicts with
+        it, so callers must treat it as read-only.
+        """
         
         # Get base yield data
-        yield_info = self.AVERAGE_YIELDS.get(crop, {"avg": 2.5, "max": 4.0, "min": 1.0})
+        profile = self._CROP_PROFILES.get(crop, self._DEFAULT_CROP_PROFILE)
+        yield_avg, yield_min, yield_max, yield_range = profile[:4]
         
         # Calculate factor scores
-        weather_score = self._calculate_weather_score(weather, crop)
-        soil_score = self._calculate_soil_score(soil, crop)
-        satellite_score = self._calculate_satellite_score(satellite)
-        seasonal_score = self._calculate_seasonal_score(crop)
+        weather_score = self._calculate_weather_score(inputs.weather, profile)
+        soil_score = self._calculate_soil_score(inputs.soil)
+        satellite_score = self._calculate_satellite_score(inputs.satellite)
+        seasonal_score = self._calculate_seasonal_score(profile, month)
         
         # Combine scores for yield prediction
+        w_weather, w_soil, w_health, w_season, w_historical = self._WEIGHTS
         combined_score = (
-            weather_score * self.RISK_WEIGHTS["weather"] +
-            soil_score * self.RISK_WEIGHTS["soil"] +
-            satellite_score * self.RISK_WEIGHTS["crop_health"] +
-            seasonal_score * self.RISK_WEIGHTS["season"] +
-            random.uniform(0.7, 0.9) * self.RISK_WEIGHTS["historical"]
+            weather_score * w_weather +
+            soil_score * w_soil +
+            satellite_score * w_health +
+            seasonal_score * w_season +
+            _jitter.uniform(0.7, 0.9) * w_historical
         )
         
         # Calculate predicted yield
-        yield_range = yield_info["max"] - yield_info["min"]
-        predicted_yield = yield_info["min"] + (yield_range * combined_score)
+        predicted_yield = yield_min + (yield_range * combined_score)
         predicted_yield = round(predicted_yield, 2)
         
         # Calculate confidence interval
-        confidence = self._calculate_confidence(weather, soil, satellite)
+        confidence = self._calculate_confidence(inputs)
         margin = predicted_yield * (1 - confidence / 100) * 0.3
         
         # Overall risk score (inverse of combined score)
         risk_score = round((1 - combined_score) * 100, 1)
         
         # Production forecast
-        crop_area = satellite.get("coverage", {}).get("crop_area", 10)  # lakh hectares
+        crop_area = inputs.crop_area  # lakh hectares
         production = round(predicted_yield * crop_area, 2)  # lakh tonnes
         
         return {
@@ -118,9 +715,9 @@ class PredictionAgent(BaseAgent):
                     "lower": round(predicted_yield - margin, 2),
                     "upper": round(predicted_yield + margin, 2)
                 },
-                "comparison_to_average": round(((predicted_yield / yield_info["avg"]) - 1) * 100, 1),
-                "historical_average": yield_info["avg"],
-                "maximum_potential": yield_info["max"]
+                "comparison_to_average": round(((predicted_yield / yield_avg) - 1) * 100, 1),
+                "historical_average": yield_avg,
+                "maximum_potential": yield_max
             },
             "production_forecast": {
                 "estimated_production": production,
@@ -147,233 +744,212 @@ class PredictionAgent(BaseAgent):
                 "crop_condition": round(satellite_score * 100, 1),
                 "seasonal_favorability": round(seasonal_score * 100, 1)
             },
-            "timestamp": datetime.now().isoformat()
+            "timestamp": coarse_timestamp()
         }
     
-    def _calculate_weather_score(self, weather: Dict, crop: str) -> float:
-        """Calculate weather favorability score (0-1)."""
-        if not weather:
-            return 0.7  # Default moderate score
+    def predict_batch(self, tasks: Sequence[Dict[str, Any]]) -> np.ndarray:
+        """
+        Predict yields for many (state, crop) tasks in one vectorized pass.
         
-        current = weather.get("current", {})
-        temp = current.get("temperature", 25)
-        humidity = current.get("humidity", 60)
-        rainfall = weather.get("rainfall", {}).get("last_24h", 20)
+        Args:
+            tasks: Sequence of task dicts shaped like `execute` input
+            
+        Returns:
+            Structured array with one BATCH_DTYPE row per task
+        """
+        self._record_execution()
+        return self._generate_prediction_batch(
+            [t.get("state", "Maharashtra") for t in tasks],
+            [t.get("crop", "Rice") for t in tasks],
+            [t.get("weather_data", {}) for t in tasks],
+            [t.get("soil_data", {}) for t in tasks],
+            [t.get("satellite_data", {}) for t in tasks]
+        )
+    
+    def _generate_prediction_batch(self, states: Sequence[str], crops: Sequence[str],
+                                   weather: Sequence[Dict], soil: Sequence[Dict],
+                                   satellite: Sequence[Dict]) -> np.ndarray:
+        """
+        Vectorized counterpart of `_generate_prediction`.
         
-        score = 1.0
+        Extracts the scoring inputs into columns once, then computes every
+        score with NumPy array operations instead of per-task Python calls.
+        """
+        n = len(crops)
+        crop_ids = np.array([self._CROP_ID.get(c, self._DEFAULT_CROP_ID) for c in crops], dtype=np.intp)
+        
+        # Column extraction (defaults mirror the scalar path); dtypes are
+        # explicit so empty batches still match the compiled kernel signature
+        has_weather = np.array([bool(w) for w in weather], dtype=bool)
+        temp = np.array([w.get("current", _EMPTY).get("temperature", 25) for w in weather], dtype=np.float64)
+        rainfall = np.array([w.get("rainfall", _EMPTY).get("last_24h", 20) for w in weather], dtype=np.float64)
+        alert_high, alert_medium = np.array(
+            [self._count_alert_severities(w.get("alerts", ())) for w in weather], dtype=np.int64
+        ).reshape(-1, 2).T
+        weather_live = np.array([bool(w) and w.get("data_source") != "simulated" for w in weather], dtype=bool)
+        
+        has_soil = np.array([bool(s) for s in soil], dtype=bool)
+        soil_health = np.array([s.get("health_score", 70) for s in soil], dtype=np.float64)
+        moisture_status = [s.get("moisture", _EMPTY).get("status", "optimal") for s in soil]
+        ph_off = np.array([s.get("ph", _EMPTY).get("status", "optimal") in self.PH_IMBALANCED for s in soil], dtype=bool)
+        
+        has_satellite = np.array([bool(s) for s in satellite], dtype=bool)
+        sat_health = np.array([s.get("health_score", 70) for s in satellite], dtype=np.float64)
+        ndvi_below = np.array([s.get("ndvi", _EMPTY).get("status", "optimal") == "below_optimal" for s in satellite],
+                              dtype=bool)
+        stress_level = [s.get("stress_analysis", _EMPTY).get("overall_stress_level") for s in satellite]
+        crop_area = np.array([s.get("coverage", _EMPTY).get("crop_area", 10) for s in satellite], dtype=np.float64)
+        
+        # Weather, soil and satellite scores (parallel numba loop when available)
+        weather_score, soil_score, satellite_score = _batch_factor_scores(
+            temp, rainfall, self._OPT_TEMP[crop_ids, 0], self._OPT_TEMP[crop_ids, 1],
+            self._WATER_LOVING[crop_ids], alert_high, alert_medium, has_weather,
+            soil_health,
+            np.array([m == "low" for m in moisture_status], dtype=bool),
+            np.array([m == "high" for m in moisture_status], dtype=bool),
+            ph_off, has_soil,
+            sat_health, ndvi_below,
+            np.array([lvl == "high" for lvl in stress_level], dtype=bool),
+            np.array([lvl == "medium" for lvl in stress_level], dtype=bool),
+            has_satellite
+        )
         
-        # Temperature impact
-        optimal_temps = {
-            "Rice": (25, 35),
-            "Wheat": (15, 25),
-            "Cotton": (25, 35),
-            "Sugarcane": (20, 30),
-        }
-        opt_range = optimal_temps.get(crop, (20, 30))
-        if temp < opt_range[0]:
-            score -= (opt_range[0] - temp) * 0.02
-        elif temp > opt_range[1]:
-            score -= (temp - opt_range[1]) * 0.02
-        
-        # Rainfall impact
-        if rainfall > 100:  # Excess rain
-            score -= 0.15
-        elif rainfall < 5 and crop in ["Rice", "Sugarcane"]:  # Too dry for water-loving crops
-            score -= 0.2
-        
-        # Weather alerts impact
-        alerts = weather.get("alerts", [])
-        for alert in alerts:
-            if alert.get("severity") == "high":
-                score -= 0.15
-            elif alert.get("severity") == "medium":
-                score -= 0.08
-        
-        return max(0.3, min(1.0, score))
-    
-    def _calculate_soil_score(self, soil: Dict, crop: str) -> float:
-        """Calculate soil health score (0-1)."""
-        if not soil:
-            return 0.7
+        # Seasonal score
+        in_season = self._IN_SEASON[datetime.now().month, crop_ids]
+        seasonal_score = np.where(
+            in_season, _rng.uniform(0.8, 0.95, n), _rng.uniform(0.5, 0.7, n)
+        )
         
-        health_score = soil.get("health_score", 70)
-        moisture_status = soil.get("moisture", {}).get("status", "optimal")
-        ph_status = soil.get("ph", {}).get("status", "optimal")
+        # Combined score: one matrix-vector product over all factors
+        factors = np.column_stack([
+            weather_score, soil_score, satellite_score, seasonal_score, _rng.uniform(0.7, 0.9, n)
+        ])
+        combined_score = factors @ self._WEIGHT_VECTOR
         
-        score = health_score / 100
+        confidence = (
+            70 + 10 * weather_live + 5 * has_soil + 10 * has_satellite
+            + _rng.integers(-5, 6, n)
+        )
         
-        # Moisture adjustment
-        if moisture_status == "low":
-            score -= 0.15
-        elif moisture_status == "high":
-            score -= 0.08
+        # Rounded columns are written straight into the output fields
+        out = np.empty(n, dtype=self.BATCH_DTYPE)
+        yield_min = self._YIELD_MIN[crop_ids]
+        predicted_yield = np.round(
+            yield_min + (self._YIELD_MAX[crop_ids] - yield_min) * combined_score, 2,
+            out=out["predicted_yield"]
+        )
+        np.round((1 - combined_score) * 100, 1, out=out["risk_score"])
+        out["confidence"] = np.clip(confidence, 50, 95)
+        out["risk_level"] = np.array(self.RISK_LEVELS)[
+            np.searchsorted(self.RISK_LEVEL_THRESHOLDS, out["risk_score"], side="right")
+        ]
+        out["confidence_level"] = np.array(self.CONFIDENCE_LEVELS)[
+            np.searchsorted(self.CONFIDENCE_LEVEL_THRESHOLDS, out["confidence"], side="right")
+        ]
+        np.round(predicted_yield * crop_area, 2, out=out["production"])
+        out["weather_score"] = weather_score
+        out["soil_score"] = soil_score
+        out["satellite_score"] = satellite_score
+        out["seasonal_score"] = seasonal_score
+        out["combined_score"] = combined_score
+        return out
+    
+    def _calculate_weather_score(self, weather: Optional[tuple], profile: _CropProfile) -> float:
+        """Calculate weather favorability score (0-1)."""
+        if weather is None:
+            return 0.7  # Default moderate score
         
-        # pH adjustment
-        if ph_status in ["acidic", "alkaline"]:
-            score -= 0.1
+        temp, _, rainfall, alert_high, alert_medium = weather
+        return _weather_score_kernel(
+            temp, rainfall, profile.opt_low, profile.opt_high, profile.water_loving,
+            alert_high, alert_medium
+        )
+    
+    def _count_alert_severities(self, alerts: Sequence[Dict]) -> Tuple[int, int]:
+        """Count (high, medium) severity alerts with C-level list.count."""
+        severities = [alert.get("severity") for alert in alerts]
+        return severities.count("high"), severities.count("medium")
+    
+    def _calculate_soil_score(self, soil: Optional[tuple]) -> float:
+        """Calculate soil health score (0-1)."""
+        if soil is None:
+            return 0.7
         
-        return max(0.3, min(1.0, score))
+        health_score, moisture_status, ph_status = soil
+        return _soil_score_kernel(
+            health_score, moisture_status == "low", moisture_status == "high",
+            ph_status in self.PH_IMBALANCED
+        )
     
-    def _calculate_satellite_score(self, satellite: Dict) -> float:
+    def _calculate_satellite_score(self, satellite: Optional[tuple]) -> float:
         """Calculate crop health score from satellite data (0-1)."""
-        if not satellite:
+        if satellite is None:
             return 0.7
         
-        health_score = satellite.get("health_score", 70)
-        ndvi_status = satellite.get("ndvi", {}).get("status", "optimal")
-        stress = satellite.get("stress_analysis", {})
-        
-        score = health_score / 100
-        
-        # NDVI status adjustment
-        if ndvi_status == "below_optimal":
-            score -= 0.1
-        
-        # Stress adjustment
-        if stress.get("overall_stress_level") == "high":
-            score -= 0.15
-        elif stress.get("overall_stress_level") == "medium":
-            score -= 0.08
-        
-        return max(0.3, min(1.0, score))
+        health_score, ndvi_status, stress_level = satellite
+        return _satellite_score_kernel(
+            health_score, ndvi_status == "below_optimal",
+            stress_level == "high", stress_level == "medium"
+        )
     
-    def _calculate_seasonal_score(self, crop: str) -> float:
+    def _calculate_seasonal_score(self, profile: _CropProfile, month: int) -> float:
         """Calculate seasonal favorability score (0-1)."""
-        month = datetime.now().month
-        
-        # Crop seasonality
-        kharif_crops = ["Rice", "Cotton", "Soybean", "Maize", "Groundnut"]
-        rabi_crops = ["Wheat", "Gram", "Mustard"]
-        
-        if crop in kharif_crops and month in [7, 8, 9, 10]:
-            return random.uniform(0.8, 0.95)
-        elif crop in rabi_crops and month in [12, 1, 2, 3]:
-            return random.uniform(0.8, 0.95)
-        else:
-            return random.uniform(0.5, 0.7)
+        if profile.in_season[month]:
+            return _jitter.uniform(0.8, 0.95)
+        return _jitter.uniform(0.5, 0.7)
     
-    def _calculate_confidence(self, weather: Dict, soil: Dict, satellite: Dict) -> int:
+    def _calculate_confidence(self, inputs: _PredictionInputs) -> int:
         """Calculate prediction confidence score."""
         base_confidence = 70
         
         # Data availability bonus
-        if weather and weather.get("data_source") != "simulated":
+        if inputs.weather_live:
             base_confidence += 10
-        if soil:
+        if inputs.soil is not None:
             base_confidence += 5
-        if satellite:
+        if inputs.satellite is not None:
             base_confidence += 10
         
         # Add some variance
-        confidence = base_confidence + random.randint(-5, 5)
+        confidence = base_confidence + _jitter.randint(-5, 5)
         
         return max(50, min(95, confidence))
     
     def _get_risk_level(self, risk_score: float) -> str:
         """Convert risk score to level."""
-        if risk_score < 20:
-            return "low"
-        elif risk_score < 40:
-            return "moderate"
-        elif risk_score < 60:
-            return "elevated"
-        elif risk_score < 80:
-            return "high"
-        return "critical"
+        return self.RISK_LEVELS[bisect_right(self.RISK_LEVEL_THRESHOLDS, risk_score)]
     
     def _get_confidence_level(self, confidence: int) -> str:
         """Convert confidence score to level."""
-        if confidence >= 85:
-            return "very_high"
-        elif confidence >= 70:
-            return "high"
-        elif confidence >= 55:
-            return "moderate"
-        return "low"
+        return self.CONFIDENCE_LEVELS[bisect_right(self.CONFIDENCE_LEVEL_THRESHOLDS, confidence)]
     
     def _get_risk_factors(self, weather_score: float, soil_score: float, 
                           satellite_score: float, seasonal_score: float) -> list:
         """Identify key risk factors."""
-        factors = []
-        
+        factors = list(self._iter_risk_factors(weather_score, soil_score, satellite_score, seasonal_score))
+        return factors or [self.NO_SIGNIFICANT_RISK]
+    
+    def _iter_risk_factors(self, weather_score: float, soil_score: float,
+                           satellite_score: float, seasonal_score: float):
+        """Yield the shared risk factor entry for each low score."""
         if weather_score < 0.6:
-            factors.append({
-                "factor": "Weather Conditions",
-                "impact": "high",
-                "description": "Unfavorable weather patterns may affect yield"
-            })
-        
+            yield self.RISK_FACTORS["weather"]
         if soil_score < 0.6:
-            factors.append({
-                "factor": "Soil Health",
-                "impact": "medium",
-                "description": "Soil conditions need improvement for optimal growth"
-            })
-        
+            yield self.RISK_FACTORS["soil"]
         if satellite_score < 0.6:
-            factors.append({
-                "factor": "Crop Health",
-                "impact": "high",
-                "description": "Crop stress detected in satellite imagery"
-            })
-        
+            yield self.RISK_FACTORS["crop_health"]
         if seasonal_score < 0.6:
-            factors.append({
-                "factor": "Seasonal Timing",
-                "impact": "medium",
-                "description": "Current season may not be optimal for this crop"
-            })
-        
-        if not factors:
-            factors.append({
-                "factor": "None Significant",
-                "impact": "low",
-                "description": "All major factors are within acceptable ranges"
-            })
-        
-        return factors
+            yield self.RISK_FACTORS["season"]
     
     def _generate_outlook(self, combined_score: float, risk_score: float, crop: str) -> str:
         """Generate human-readable outlook."""
-        if combined_score >= 0.8:
-            return f"Excellent outlook for {crop}. Conditions are favorable and yield is expected to exceed historical averages."
-        elif combined_score >= 0.65:
-            return f"Good outlook for {crop}. Most factors are positive, though minor issues may slightly impact yield."
-        elif combined_score >= 0.5:
-            return f"Moderate outlook for {crop}. Some challenges exist that may affect yield. Close monitoring recommended."
-        elif combined_score >= 0.35:
-            return f"Concerning outlook for {crop}. Multiple factors are unfavorable. Immediate corrective action advised."
-        else:
-            return f"Poor outlook for {crop}. Significant challenges detected. Consider consulting agricultural experts."
+        template = self.OUTLOOK_TEMPLATES[bisect_right(self.OUTLOOK_THRESHOLDS, combined_score)]
+        return template.format(crop=crop)
     
     def _generate_yield_recommendations(self, weather_score: float, soil_score: float,
                                         satellite_score: float, crop: str) -> list:
         """Generate actionable recommendations."""
-        recommendations = []
-        
-        if weather_score < 0.6:
-            recommendations.append({
-                "category": "Weather Management",
-                "priority": "high",
-                "action": "Install protective measures like shade nets or mulching",
-                "expected_impact": "Reduce weather-related stress by 20-30%"
-            })
-        
-        if soil_score < 0.6:
-            recommendations.append({
-                "category": "Soil Improvement",
-                "priority": "high",
-                "action": "Apply recommended fertilizers and soil amendments",
-                "expected_impact": "Improve soil health score by 15-25%"
-            })
-        
-        if satellite_score < 0.6:
-            recommendations.append({
-                "category": "Crop Management",
-                "priority": "high",
-                "action": "Inspect fields for pest/disease and apply treatments if needed",
-                "expected_impact": "Prevent further health decline"
-            })
+        recommendations = list(self._iter_yield_recommendations(weather_score, soil_score, satellite_score))
         
         # General recommendation
         recommendations.append({
@@ -384,3 +960,12 @@ class PredictionAgent(BaseAgent):
         })
         
         return recommendations
+    
+    def _iter_yield_recommendations(self, weather_score: float, soil_score: float, satellite_score: float):
+        """Yield the shared recommendation entry for each low score."""
+        if weather_score < 0.6:
+            yield self.YIELD_RECOMMENDATIONS["weather"]
+        if soil_score < 0.6:
+            yield self.YIELD_RECOMMENDATIONS["soil"]
+        if satellite_score < 0.6:
+            yield self.YIELD_RECOMMENDATIONS["crop_health"]
@@ -1,12 +1,178 @@
 """
 Response Agent - Formats and delivers multilingual responses to farmers.
 """
-from typing import Dict, Any, List
-from datetime import datetime
-from .base_agent import BaseAgent
-import sys
-sys.path.append('..')
-from config import config
+from bisect import bisect_right
+from functools import lru_cache
+from string import Formatter
+from typing import Dict, Any, List, NamedTuple, Optional, Tuple, TypedDict
+import numpy as np
+from .base_agent import BaseAgent, coarse_timestamp
+
+# Read-only default for nested `.get` lookups, so misses don't allocate
+_EMPTY: Dict[str, Any] = {}
+
+
+class ResponseView(TypedDict):
+    """Fixed layout of a formatted response; a plain dict at runtime."""
+    query: str
+    language: str
+    greeting: str
+    summary: Dict[str, str]
+    weather_card: Dict[str, Any]
+    soil_card: Dict[str, Any]
+    crop_health_card: Dict[str, Any]
+    prediction_details: Dict[str, Any]
+    alerts_formatted: List[Dict[str, Any]]
+    charts: Dict[str, Any]
+    recommendations: List[Dict[str, Any]]
+    irrigation_advice: Dict[str, Any]
+    confidence: Dict[str, Any]
+    timestamp: str
+
+
+class _UnitPack(NamedTuple):
+    """Display units for one language."""
+    temperature: str
+    humidity: str
+    rainfall: str
+    yield_: str  # "yield" is a keyword
+
+
+class _LangPack(NamedTuple):
+    """All response phrases for one language, resolved once at import."""
+    greeting: str
+    yield_good: str
+    yield_moderate: str
+    yield_poor: str
+    risk_low: str
+    risk_medium: str
+    risk_high: str
+    recommendation: str
+    weather_summary: str
+    soil_summary: str
+    crop_health: str
+    need_action: str
+    no_action: str
+    units: _UnitPack
+    yield_messages: Tuple[str, str, str]  # (poor, moderate, good)
+    risk_messages: Tuple[str, str, str]  # (low, medium, high)
+
+
+def _compile_lang_packs(translations: Dict[str, Dict[str, Any]]) -> Dict[str, _LangPack]:
+    """Freeze each language's translation dict into a _LangPack."""
+    packs = {}
+    for language, t in translations.items():
+        units = t["units"]
+        phrases = {field: t[field] for field in _LangPack._fields if field in t and field != "units"}
+        packs[language] = _LangPack(
+            **phrases,
+            units=_UnitPack(units["temperature"], units["humidity"], units["rainfall"], units["yield"]),
+            yield_messages=(t["yield_poor"], t["yield_moderate"], t["yield_good"]),
+            risk_messages=(t["risk_low"], t["risk_medium"], t["risk_high"])
+        )
+    return packs
+
+
+def _flatten_names(names: Dict[str, Dict[str, str]]) -> Dict[Tuple[str, str], str]:
+    """Turn {name: {language: translated}} into {(name, language): translated}."""
+    return {
+        (name, language): translated
+        for name, by_language in names.items()
+        for language, translated in by_language.items()
+    }
+
+
+# Summary phrasing per language. {crop} and {state} are filled once per
+# (language, crop, state); doubled braces survive that pass and are
+# filled per request.
+_SUMMARY_TEMPLATES = {
+    "en": {
+        "base": "Based on current weather, soil, and satellite data, the predicted yield for {crop} in {state} is {{predicted}} {{unit}}. "
+                "Our confidence in this prediction is {{confidence}}%. ",
+        "favorable": "Overall conditions look favorable. ",
+        "attention": "There are {{alert_count}} alerts requiring attention. "
+    },
+    "hi": {
+        "base": "वर्तमान मौसम, मिट्टी और उपग्रह डेटा के आधार पर, {state} में {crop} की अनुमानित उपज {{predicted}} टन/हेक्टेयर है। "
+                "इस भविष्यवाणी में हमारा विश्वास {{confidence}}% है। ",
+        "favorable": "समग्र स्थितियां अनुकूल दिखती हैं। ",
+        "attention": "{{alert_count}} अलर्ट हैं जिन पर ध्यान देने की आवश्यकता है। "
+    },
+    "mr": {
+        "base": "सध्याच्या हवामान, माती आणि उपग्रह डेटावर आधारित, {state} मधील {crop} साठी अंदाजे उत्पादन {{predicted}} टन/हेक्टर आहे। "
+                "या अंदाजात आमचा विश्वास {{confidence}}% आहे। ",
+        "favorable": "एकंदर परिस्थिती अनुकूल दिसत आहे। ",
+        "attention": "{{alert_count}} सूचना आहेत ज्यांवर लक्ष देणे आवश्यक आहे। "
+    }
+}
+
+# Risk levels for which the summary calls conditions favorable
+_FAVORABLE_RISK_LEVELS = frozenset({"low", "moderate"})
+
+
+# A format string pre-split into (literal, field name or None) parts
+_ParsedTemplate = Tuple[Tuple[str, Optional[str]], ...]
+
+
+def _parse_template(template: str) -> _ParsedTemplate:
+    """Split a format string once so rendering skips format-spec parsing."""
+    return tuple((literal, field) for literal, field, _, _ in Formatter().parse(template))
+
+
+def _render_template(parts: _ParsedTemplate, values: Dict[str, Any]) -> str:
+    """Render a parsed template; equivalent to `template.format(**values)`."""
+    out = []
+    for literal, field in parts:
+        out.append(literal)
+        if field is not None:
+            out.append(format(values[field]))
+    return "".join(out)
+
+
+@lru_cache(maxsize=1024)
+def _summary_templates(language: str, crop: str, state: str) -> Tuple[_ParsedTemplate, _ParsedTemplate]:
+    """
+    Parsed summary templates for (favorable, needs-attention) outlooks.
+    
+    Crop and state are baked in, leaving {predicted}, {unit}, {confidence}
+    and {alert_count} to fill per request.
+    """
+    tpl = _SUMMARY_TEMPLATES.get(language, _SUMMARY_TEMPLATES["en"])
+    # Queries naming no state or crop pass None, which str.format rendered
+    # as "None"; braces are escaped so they survive the per-request format
+    names = {"crop": str(crop).replace("{", "{{").replace("}", "}}"),
+             "state": str(state).replace("{", "{{").replace("}", "}}")}
+    return (
+        _parse_template((tpl["base"] + tpl["favorable"]).format(**names)),
+        _parse_template((tpl["base"] + tpl["attention"]).format(**names))
+    )
+
+
+@lru_cache(maxsize=1024)
+def _greeting(template: str, crop: str, state: str) -> str:
+    """Fill a greeting template; the inputs repeat across requests."""
+    return template.format(crop=crop, state=state)
+
+
+# (keyword, icon) pairs checked in priority order against a lowercased
+# weather description; the first keyword found wins
+_WEATHER_ICON_KEYWORDS = (
+    ("rain", "🌧️"),
+    ("thunder", "⛈️"),
+    ("cloud", "☁️"),
+    ("sun", "☀️"),
+    ("clear", "☀️"),
+    ("hot", "🌡️"),
+    ("heat", "🌡️"),
+)
+
+
+@lru_cache(maxsize=256)
+def _weather_icon(description: str) -> str:
+    """Icon for a weather description; descriptions come from a small set."""
+    description = description.lower()
+    return next((icon for keyword, icon in _WEATHER_ICON_KEYWORDS if keyword in description), "🌤️")
+
 
 class ResponseAgent(BaseAgent):
     """Agent responsible for formatting responses and generating recommendations."""
@@ -103,6 +269,62 @@ class ResponseAgent(BaseAgent):
         "Groundnut": {"hi": "मूंगफली", "mr": "भुईमूग"},
     }
     
+    # Summary message buckets (see _format_complete_response)
+    YIELD_MESSAGE_MARGIN = 10
+    RISK_MESSAGE_THRESHOLDS = (30, 60)
+    
+    # Sort order for recommendation priorities (unknown priorities last)
+    PRIORITY_RANK = {"high": 0, "medium": 1, "low": 2}
+    
+    # Alert display by severity
+    ALERT_ICONS = {
+        "critical": "🚨",
+        "high": "⚠️",
+        "medium": "⚡",
+        "low": "ℹ️"
+    }
+    ALERT_COLORS = {
+        "critical": "#FF0000",
+        "high": "#FF6600",
+        "medium": "#FFCC00",
+        "low": "#00CC00"
+    }
+    
+    # Irrigation advice: (urgency, timing, amount) per action
+    IRRIGATION_PLANS = {
+        "irrigate": ("high", "Early morning (6-8 AM) or evening (5-7 PM)", "25-30mm equivalent"),
+        "skip": ("low", "N/A", "0mm"),
+        "wait": ("medium", "After rain assessment", "To be determined"),
+        "monitor": ("low", "Check again in 2-3 days", "N/A"),
+    }
+    
+    # Irrigation advice messages keyed by (action, language); {moisture} is filled per request
+    IRRIGATION_MESSAGES = {
+        ("irrigate", "en"): "Irrigation recommended. Soil moisture is low ({moisture}%) and no rain expected.",
+        ("irrigate", "hi"): "सिंचाई की सिफारिश। मिट्टी की नमी कम है ({moisture}%) और बारिश की उम्मीद नहीं है।",
+        ("irrigate", "mr"): "सिंचनाची शिफारस. मातीची आर्द्रता कमी आहे ({moisture}%) आणि पावसाची अपेक्षा नाही.",
+        ("skip", "en"): "No irrigation needed. Soil moisture adequate ({moisture}%) or recent rainfall.",
+        ("skip", "hi"): "सिंचाई की जरूरत नहीं। मिट्टी की नमी पर्याप्त ({moisture}%) या हाल ही में बारिश।",
+        ("skip", "mr"): "सिंचनाची गरज नाही. मातीची आर्द्रता पुरेशी ({moisture}%) किंवा अलीकडील पाऊस.",
+        ("wait", "en"): "Rain expected in next 24-48 hours. Wait before irrigating.",
+        ("wait", "hi"): "अगले 24-48 घंटों में बारिश की उम्मीद। सिंचाई से पहले प्रतीक्षा करें।",
+        ("wait", "mr"): "पुढील 24-48 तासांत पावसाची अपेक्षा. सिंचन करण्यापूर्वी प्रतीक्षा करा.",
+        ("monitor", "en"): "Soil moisture is adequate ({moisture}%). Continue monitoring.",
+        ("monitor", "hi"): "मिट्टी की नमी पर्याप्त है ({moisture}%)। निगरानी जारी रखें।",
+        ("monitor", "mr"): "मातीची आर्द्रता पुरेशी आहे ({moisture}%). निरीक्षण सुरू ठेवा.",
+    }
+    IRRIGATION_FALLBACK_MESSAGES = {
+        "irrigate": "Irrigation recommended. Soil moisture is low ({moisture}%)",
+        "skip": "No irrigation needed.",
+        "wait": "Rain expected. Wait before irrigating.",
+        "monitor": "Soil moisture adequate ({moisture}%).",
+    }
+    
+    # Import-time lookup tables derived from the dicts above
+    _LANG_PACKS = _compile_lang_packs(TRANSLATIONS)
+    _STATE_NAME_LOOKUP = _flatten_names(STATE_NAMES)
+    _CROP_NAME_LOOKUP = _flatten_names(CROP_NAMES)
+    
     def __init__(self):
         super().__init__("ResponseAgent")
     
@@ -115,7 +337,7 @@ class ResponseAgent(BaseAgent):
             "format_alerts"
         ]
     
-    async def execute(self, task: Dict[str, Any]) -> Dict[str, Any]:
+    async def execute(self, task: Dict[str, Any]) -> ResponseView:
         """
         Execute response formatting task.
         
@@ -125,7 +347,7 @@ class ResponseAgent(BaseAgent):
         Returns:
             Formatted response with charts data and recommendations
         """
-        self.log_activity(f"Formatting response in {task.get('language', 'en')}")
+        self.log_activity("Formatting response in %s", task.get('language', 'en'))
         self._record_execution()
         
         language = task.get("language", "en")
@@ -149,41 +371,39 @@ class ResponseAgent(BaseAgent):
     
     def _format_complete_response(self, language: str, state: str, crop: str, query: str,
                                   weather: Dict, soil: Dict, satellite: Dict,
-                                  prediction: Dict, alerts: Dict) -> Dict[str, Any]:
+                                  prediction: Dict, alerts: Dict) -> ResponseView:
         """Format the complete response with all components."""
         
-        t = self.TRANSLATIONS.get(language, self.TRANSLATIONS["en"])
+        t = self._LANG_PACKS.get(language, self._LANG_PACKS["en"])
         
-        # Translate names
-        translated_state = self._translate_name(state, language, self.STATE_NAMES)
-        translated_crop = self._translate_name(crop, language, self.CROP_NAMES)
+        # Translate names (English, the common case, uses them as-is)
+        if language == "en":
+            translated_state, translated_crop = state, crop
+        else:
+            translated_state = self._translate_name(state, language, self._STATE_NAME_LOOKUP)
+            translated_crop = self._translate_name(crop, language, self._CROP_NAME_LOOKUP)
         
         # Main response text
-        greeting = t["greeting"].format(crop=translated_crop, state=translated_state)
+        greeting = _greeting(t.greeting, translated_crop, translated_state)
         
         # Yield summary
-        yield_pred = prediction.get("yield_prediction", {})
+        yield_pred = prediction.get("yield_prediction", _EMPTY)
         predicted_yield = yield_pred.get("predicted", 0)
         comparison = yield_pred.get("comparison_to_average", 0)
         
-        if comparison > 10:
-            yield_text = t["yield_good"]
-        elif comparison < -10:
-            yield_text = t["yield_poor"]
-        else:
-            yield_text = t["yield_moderate"]
+        # More than YIELD_MESSAGE_MARGIN % either side of average is good/poor
+        margin = self.YIELD_MESSAGE_MARGIN
+        yield_text = t.yield_messages[(comparison >= -margin) + (comparison > margin)]
         
         # Risk level
-        risk_score = prediction.get("risk_assessment", {}).get("overall_risk_score", 30)
-        if risk_score < 30:
-            risk_text = t["risk_low"]
-        elif risk_score < 60:
-            risk_text = t["risk_medium"]
-        else:
-            risk_text = t["risk_high"]
+        risk_score = prediction.get("risk_assessment", _EMPTY).get("overall_risk_score", 30)
+        risk_text = t.risk_messages[bisect_right(self.RISK_MESSAGE_THRESHOLDS, risk_score)]
+        
+        confidence = prediction.get("confidence", _EMPTY)
+        confidence_score = confidence.get("score", 70)
         
         # Build response
-        response = {
+        response: ResponseView = {
             "query": query,
             "language": language,
             "greeting": greeting,
@@ -222,135 +442,128 @@ class ResponseAgent(BaseAgent):
             
             # Confidence indicator
             "confidence": {
-                "score": prediction.get("confidence", {}).get("score", 70),
-                "level": prediction.get("confidence", {}).get("level", "moderate"),
-                "display": f"{prediction.get('confidence', {}).get('score', 70)}%"
+                "score": confidence_score,
+                "level": confidence.get("level", "moderate"),
+                "display": f"{confidence_score}%"
             },
             
-            "timestamp": datetime.now().isoformat()
+            "timestamp": coarse_timestamp()
         }
         
         return response
     
-    def _translate_name(self, name: str, language: str, mapping: Dict) -> str:
-        """Translate a name to the target language."""
+    def _translate_name(self, name: str, language: str, mapping: Dict[Tuple[str, str], str]) -> str:
+        """Translate a name via a flat {(name, language): translated} mapping."""
         if language == "en":
             return name
-        return mapping.get(name, {}).get(language, name)
+        return mapping.get((name, language), name)
     
     def _build_summary_text(self, language: str, crop: str, state: str,
                            yield_pred: Dict, prediction: Dict, alerts: Dict) -> str:
         """Build a natural language summary."""
         predicted = yield_pred.get("predicted", 0)
         unit = yield_pred.get("unit", "tonnes/ha")
-        confidence = prediction.get("confidence", {}).get("score", 70)
-        risk_level = prediction.get("risk_assessment", {}).get("risk_level", "moderate")
+        confidence = prediction.get("confidence", _EMPTY).get("score", 70)
+        risk_level = prediction.get("risk_assessment", _EMPTY).get("risk_level", "moderate")
         alert_count = alerts.get("alert_count", 0)
         
-        if language == "en":
-            summary = f"Based on current weather, soil, and satellite data, the predicted yield for {crop} in {state} is {predicted} {unit}. "
-            summary += f"Our confidence in this prediction is {confidence}%. "
-            if risk_level in ["low", "moderate"]:
-                summary += "Overall conditions look favorable. "
-            else:
-                summary += f"There are {alert_count} alerts requiring attention. "
-        elif language == "hi":
-            summary = f"वर्तमान मौसम, मिट्टी और उपग्रह डेटा के आधार पर, {state} में {crop} की अनुमानित उपज {predicted} टन/हेक्टेयर है। "
-            summary += f"इस भविष्यवाणी में हमारा विश्वास {confidence}% है। "
-            if risk_level in ["low", "moderate"]:
-                summary += "समग्र स्थितियां अनुकूल दिखती हैं। "
-            else:
-                summary += f"{alert_count} अलर्ट हैं जिन पर ध्यान देने की आवश्यकता है। "
-        else:  # Marathi
-            summary = f"सध्याच्या हवामान, माती आणि उपग्रह डेटावर आधारित, {state} मधील {crop} साठी अंदाजे उत्पादन {predicted} टन/हेक्टर आहे। "
-            summary += f"या अंदाजात आमचा विश्वास {confidence}% आहे। "
-            if risk_level in ["low", "moderate"]:
-                summary += "एकंदर परिस्थिती अनुकूल दिसत आहे। "
-            else:
-                summary += f"{alert_count} सूचना आहेत ज्यांवर लक्ष देणे आवश्यक आहे। "
-        
-        return summary
+        favorable, needs_attention = _summary_templates(language, crop, state)
+        template = favorable if risk_level in _FAVORABLE_RISK_LEVELS else needs_attention
+        return _render_template(template, {
+            "predicted": predicted, "unit": unit, "confidence": confidence, "alert_count": alert_count
+        })
     
-    def _format_weather_card(self, weather: Dict, language: str, t: Dict) -> Dict[str, Any]:
+    def _format_weather_card(self, weather: Dict, language: str, t: _LangPack) -> Dict[str, Any]:
         """Format weather data for display card."""
-        current = weather.get("current", {})
-        units = t.get("units", {})
+        current = weather.get("current", _EMPTY)
+        units = t.units
+        temp, temp_unit = current.get("temperature", 25), units.temperature
+        humidity, humidity_unit = current.get("humidity", 60), units.humidity
+        rain, rain_unit = weather.get("rainfall", _EMPTY).get("last_24h", 0), units.rainfall
         
         return {
-            "title": t.get("weather_summary", "Weather Summary"),
+            "title": t.weather_summary,
             "temperature": {
-                "value": current.get("temperature", 25),
-                "unit": units.get("temperature", "°C"),
-                "display": f"{current.get('temperature', 25)}{units.get('temperature', '°C')}"
+                "value": temp,
+                "unit": temp_unit,
+                "display": f"{temp}{temp_unit}"
             },
             "humidity": {
-                "value": current.get("humidity", 60),
-                "unit": units.get("humidity", "%"),
-                "display": f"{current.get('humidity', 60)}{units.get('humidity', '%')}"
+                "value": humidity,
+                "unit": humidity_unit,
+                "display": f"{humidity}{humidity_unit}"
             },
             "rainfall_24h": {
-                "value": weather.get("rainfall", {}).get("last_24h", 0),
-                "unit": units.get("rainfall", "mm"),
-                "display": f"{weather.get('rainfall', {}).get('last_24h', 0)}{units.get('rainfall', 'mm')}"
+                "value": rain,
+                "unit": rain_unit,
+                "display": f"{rain}{rain_unit}"
             },
             "description": current.get("description", "Clear"),
             "icon": self._get_weather_icon(current.get("description", "clear"))
         }
     
-    def _format_soil_card(self, soil: Dict, language: str, t: Dict) -> Dict[str, Any]:
+    def _format_soil_card(self, soil: Dict, language: str, t: _LangPack) -> Dict[str, Any]:
         """Format soil data for display card."""
+        moisture = soil.get("moisture", _EMPTY)
+        ph = soil.get("ph", _EMPTY)
+        moisture_value = moisture.get("current", 50)
+        ph_value = ph.get("current", 7.0)
+        
         return {
-            "title": t.get("soil_summary", "Soil Conditions"),
+            "title": t.soil_summary,
             "type": soil.get("soil_type", "Unknown"),
             "moisture": {
-                "value": soil.get("moisture", {}).get("current", 50),
-                "status": soil.get("moisture", {}).get("status", "optimal"),
-                "display": f"{soil.get('moisture', {}).get('current', 50)}%"
+                "value": moisture_value,
+                "status": moisture.get("status", "optimal"),
+                "display": f"{moisture_value}%"
             },
             "ph": {
-                "value": soil.get("ph", {}).get("current", 7.0),
-                "status": soil.get("ph", {}).get("status", "optimal"),
-                "display": str(soil.get("ph", {}).get("current", 7.0))
+                "value": ph_value,
+                "status": ph.get("status", "optimal"),
+                "display": str(ph_value)
             },
             "health_score": soil.get("health_score", 70),
-            "npk_summary": self._format_npk_summary(soil.get("npk", {}))
+            "npk_summary": self._format_npk_summary(soil.get("npk", _EMPTY))
         }
     
     def _format_npk_summary(self, npk: Dict) -> Dict[str, str]:
         """Format NPK summary."""
         return {
-            "nitrogen": npk.get("nitrogen", {}).get("status", "adequate"),
-            "phosphorus": npk.get("phosphorus", {}).get("status", "adequate"),
-            "potassium": npk.get("potassium", {}).get("status", "adequate")
+            "nitrogen": npk.get("nitrogen", _EMPTY).get("status", "adequate"),
+            "phosphorus": npk.get("phosphorus", _EMPTY).get("status", "adequate"),
+            "potassium": npk.get("potassium", _EMPTY).get("status", "adequate")
         }
     
-    def _format_crop_health_card(self, satellite: Dict, language: str, t: Dict) -> Dict[str, Any]:
+    def _format_crop_health_card(self, satellite: Dict, language: str, t: _LangPack) -> Dict[str, Any]:
         """Format crop health data for display card."""
+        ndvi = satellite.get("ndvi", _EMPTY)
+        
         return {
-            "title": t.get("crop_health", "Crop Health"),
+            "title": t.crop_health,
             "ndvi": {
-                "value": satellite.get("ndvi", {}).get("current", 0.5),
-                "interpretation": satellite.get("ndvi", {}).get("interpretation", "Moderate"),
-                "status": satellite.get("ndvi", {}).get("status", "optimal")
+                "value": ndvi.get("current", 0.5),
+                "interpretation": ndvi.get("interpretation", "Moderate"),
+                "status": ndvi.get("status", "optimal")
             },
             "health_score": satellite.get("health_score", 70),
             "health_status": satellite.get("health_status", "good"),
-            "growth_stage": satellite.get("growth_stage", {}).get("current_stage", "Active Growth"),
-            "stress_detected": satellite.get("stress_analysis", {}).get("stress_detected", False),
+            "growth_stage": satellite.get("growth_stage", _EMPTY).get("current_stage", "Active Growth"),
+            "stress_detected": satellite.get("stress_analysis", _EMPTY).get("stress_detected", False),
             "coverage": satellite.get("coverage", {})
         }
     
     def _format_prediction_details(self, prediction: Dict, language: str) -> Dict[str, Any]:
         """Format prediction details."""
-        yield_pred = prediction.get("yield_prediction", {})
+        yield_pred = prediction.get("yield_prediction", _EMPTY)
+        interval = yield_pred.get("confidence_interval", _EMPTY)
         
         return {
             "yield": {
                 "predicted": yield_pred.get("predicted", 0),
                 "unit": yield_pred.get("unit", "tonnes/ha"),
                 "range": {
-                    "lower": yield_pred.get("confidence_interval", {}).get("lower", 0),
-                    "upper": yield_pred.get("confidence_interval", {}).get("upper", 0)
+                    "lower": interval.get("lower", 0),
+                    "upper": interval.get("upper", 0)
                 },
                 "vs_average": yield_pred.get("comparison_to_average", 0)
             },
@@ -362,32 +575,89 @@ class ResponseAgent(BaseAgent):
     
     def _format_alerts(self, alerts: Dict, language: str) -> List[Dict]:
         """Format alerts for display."""
-        formatted = []
+        active_alerts = alerts.get("active_alerts")
+        if not active_alerts:
+            return []
         
-        for alert in alerts.get("active_alerts", []):
+        icons, colors = self.ALERT_ICONS, self.ALERT_COLORS
+        formatted = []
+        for alert in active_alerts:
+            severity = alert.get("severity")
             formatted.append({
                 "type": alert.get("type"),
-                "severity": alert.get("severity"),
+                "severity": severity,
                 "title": alert.get("title"),
                 "message": alert.get("message"),
                 "action": alert.get("recommended_action"),
-                "icon": self._get_alert_icon(alert.get("severity")),
-                "color": self._get_alert_color(alert.get("severity"))
+                "icon": icons.get(severity, "📢"),
+                "color": colors.get(severity, "#888888")
             })
         
         return formatted
     
     def _generate_charts_data(self, weather: Dict, soil: Dict, satellite: Dict, prediction: Dict) -> Dict[str, Any]:
         """Generate data for frontend charts."""
+        yield_pred = prediction.get("yield_prediction", _EMPTY)
+        historical_average = yield_pred.get("historical_average", 2.5)
+        npk = soil.get("npk", _EMPTY)
         
-        # Yield gauge chart
-        yield_pred = prediction.get("yield_prediction", {})
+        return self._assemble_charts(
+            weather, prediction, yield_pred,
+            historical_average * 0.8, historical_average,
+            [
+                npk.get("nitrogen", _EMPTY).get("current", 200),
+                npk.get("phosphorus", _EMPTY).get("current", 30) * 5,  # Scale for visualization
+                npk.get("potassium", _EMPTY).get("current", 180)
+            ]
+        )
+    
+    def _generate_charts_data_batch(self, weather_list: List[Dict], soil_list: List[Dict],
+                                    satellite_list: List[Dict], prediction_list: List[Dict]) -> List[Dict[str, Any]]:
+        """
+        Chart data for many responses at once (e.g. digest generation).
         
+        The numeric columns (gauge thresholds, scaled nutrients) are computed
+        with NumPy across the whole batch; values come back as floats.
+        """
+        yield_preds = [p.get("yield_prediction", _EMPTY) for p in prediction_list]
+        historical_average = np.fromiter(
+            (y.get("historical_average", 2.5) for y in yield_preds), dtype=np.float64, count=len(yield_preds)
+        )
+        nutrients = np.array([
+            [
+                npk.get("nitrogen", _EMPTY).get("current", 200),
+                npk.get("phosphorus", _EMPTY).get("current", 30),
+                npk.get("potassium", _EMPTY).get("current", 180)
+            ]
+            for npk in (s.get("npk", _EMPTY) for s in soil_list)
+        ], dtype=np.float64).reshape(-1, 3)
+        nutrients[:, 1] *= 5  # Scale phosphorus for visualization
+        
+        return [
+            self._assemble_charts(weather, prediction, yield_pred, low, average, nutrient_values)
+            for weather, prediction, yield_pred, low, average, nutrient_values in zip(
+                weather_list, prediction_list, yield_preds,
+                (historical_average * 0.8).tolist(), historical_average.tolist(), nutrients.tolist()
+            )
+        ]
+    
+    def _assemble_charts(self, weather: Dict, prediction: Dict, yield_pred: Dict,
+                         low_threshold: float, average_threshold: float,
+                         nutrient_values: List[float]) -> Dict[str, Any]:
+        """Lay out the chart payload around precomputed numeric values."""
         # Factor breakdown pie chart
-        factors = prediction.get("factor_scores", {})
+        factors = prediction.get("factor_scores", _EMPTY)
+        
+        # Weather forecast line chart, built in a single pass over the forecast
+        labels, temps, rain_probs = [], [], []
+        add_label, add_temp, add_rain = labels.append, temps.append, rain_probs.append
+        for f in weather.get("forecast", ()):
+            add_label(f.get("datetime", "")[:10])
+            add_temp(f.get("temperature", 25))
+            add_rain(f.get("rain_probability", 0))
         
-        # Weather forecast line chart
-        forecast = weather.get("forecast", [])
+        # Risk breakdown doughnut chart
+        risk_factors = prediction.get("risk_assessment", _EMPTY).get("factors", ())
         
         return {
             "yield_gauge": {
@@ -396,8 +666,8 @@ class ResponseAgent(BaseAgent):
                 "min": 0,
                 "max": yield_pred.get("maximum_potential", 5),
                 "thresholds": [
-                    {"value": yield_pred.get("historical_average", 2.5) * 0.8, "color": "#FF6B6B"},
-                    {"value": yield_pred.get("historical_average", 2.5), "color": "#FFD93D"},
+                    {"value": low_threshold, "color": "#FF6B6B"},
+                    {"value": average_threshold, "color": "#FFD93D"},
                     {"value": yield_pred.get("maximum_potential", 5), "color": "#6BCB77"}
                 ]
             },
@@ -413,40 +683,41 @@ class ResponseAgent(BaseAgent):
             },
             "weather_forecast": {
                 "type": "line",
-                "labels": [f.get("datetime", "")[:10] for f in forecast],
+                "labels": labels,
                 "datasets": [
                     {
                         "label": "Temperature",
-                        "data": [f.get("temperature", 25) for f in forecast]
+                        "data": temps
                     },
                     {
                         "label": "Rain Probability",
-                        "data": [f.get("rain_probability", 0) for f in forecast]
+                        "data": rain_probs
                     }
                 ]
             },
             "soil_nutrients": {
                 "type": "bar",
                 "labels": ["Nitrogen", "Phosphorus", "Potassium"],
-                "values": [
-                    soil.get("npk", {}).get("nitrogen", {}).get("current", 200),
-                    soil.get("npk", {}).get("phosphorus", {}).get("current", 30) * 5,  # Scale for visualization
-                    soil.get("npk", {}).get("potassium", {}).get("current", 180)
-                ]
+                "values": nutrient_values
             },
             "risk_breakdown": {
                 "type": "doughnut",
-                "labels": [f.get("factor") for f in prediction.get("risk_assessment", {}).get("factors", [])],
-                "values": [1 for _ in prediction.get("risk_assessment", {}).get("factors", [])]
+                "labels": [f.get("factor") for f in risk_factors],
+                "values": [1] * len(risk_factors)
             }
         }
     
     def _format_recommendations(self, prediction: Dict, soil: Dict, alerts: Dict, language: str) -> List[Dict]:
         """Format actionable recommendations."""
+        prediction_recs = prediction.get("recommendations")
+        soil_recs = soil.get("recommendations")
+        if not prediction_recs and not soil_recs:
+            return []
+        
         recommendations = []
         
         # From prediction agent
-        for rec in prediction.get("recommendations", []):
+        for rec in prediction_recs or ():
             recommendations.append({
                 "category": rec.get("category"),
                 "priority": rec.get("priority"),
@@ -456,7 +727,7 @@ class ResponseAgent(BaseAgent):
             })
         
         # From soil agent
-        for rec in soil.get("recommendations", []):
+        for rec in soil_recs or ():
             recommendations.append({
                 "category": rec.get("type", "").replace("_", " ").title(),
                 "priority": rec.get("priority"),
@@ -465,97 +736,45 @@ class ResponseAgent(BaseAgent):
                 "icon": "🌱"
             })
         
-        return sorted(recommendations, key=lambda x: {"high": 0, "medium": 1, "low": 2}.get(x.get("priority", "low"), 3))
+        rank = self.PRIORITY_RANK.get
+        recommendations.sort(key=lambda x: rank(x.get("priority", "low"), 3))
+        return recommendations
     
     def _generate_irrigation_advice(self, weather: Dict, soil: Dict, crop: str, language: str) -> Dict[str, Any]:
         """Generate smart irrigation advice."""
-        moisture = soil.get("moisture", {}).get("current", 50)
-        status = soil.get("moisture", {}).get("status", "optimal")
-        rainfall = weather.get("rainfall", {}).get("last_24h", 0)
+        soil_moisture = soil.get("moisture", _EMPTY)
+        moisture = soil_moisture.get("current", 50)
+        status = soil_moisture.get("status", "optimal")
+        rainfall = weather.get("rainfall", _EMPTY).get("last_24h", 0)
         rain_forecast = any(f.get("rain_probability", 0) > 60 for f in weather.get("forecast", [])[:2])
         
         if status == "low" and not rain_forecast:
-            advice = {
-                "action": "irrigate",
-                "urgency": "high",
-                "message": {
-                    "en": f"Irrigation recommended. Soil moisture is low ({moisture}%) and no rain expected.",
-                    "hi": f"सिंचाई की सिफारिश। मिट्टी की नमी कम है ({moisture}%) और बारिश की उम्मीद नहीं है।",
-                    "mr": f"सिंचनाची शिफारस. मातीची आर्द्रता कमी आहे ({moisture}%) आणि पावसाची अपेक्षा नाही."
-                }.get(language, f"Irrigation recommended. Soil moisture is low ({moisture}%)"),
-                "timing": "Early morning (6-8 AM) or evening (5-7 PM)",
-                "amount": "25-30mm equivalent"
-            }
+            action = "irrigate"
         elif status == "high" or rainfall > 50:
-            advice = {
-                "action": "skip",
-                "urgency": "low",
-                "message": {
-                    "en": f"No irrigation needed. Soil moisture adequate ({moisture}%) or recent rainfall.",
-                    "hi": f"सिंचाई की जरूरत नहीं। मिट्टी की नमी पर्याप्त ({moisture}%) या हाल ही में बारिश।",
-                    "mr": f"सिंचनाची गरज नाही. मातीची आर्द्रता पुरेशी ({moisture}%) किंवा अलीकडील पाऊस."
-                }.get(language, f"No irrigation needed."),
-                "timing": "N/A",
-                "amount": "0mm"
-            }
+            action = "skip"
         elif rain_forecast:
-            advice = {
-                "action": "wait",
-                "urgency": "medium",
-                "message": {
-                    "en": "Rain expected in next 24-48 hours. Wait before irrigating.",
-                    "hi": "अगले 24-48 घंटों में बारिश की उम्मीद। सिंचाई से पहले प्रतीक्षा करें।",
-                    "mr": "पुढील 24-48 तासांत पावसाची अपेक्षा. सिंचन करण्यापूर्वी प्रतीक्षा करा."
-                }.get(language, "Rain expected. Wait before irrigating."),
-                "timing": "After rain assessment",
-                "amount": "To be determined"
-            }
+            action = "wait"
         else:
-            advice = {
-                "action": "monitor",
-                "urgency": "low",
-                "message": {
-                    "en": f"Soil moisture is adequate ({moisture}%). Continue monitoring.",
-                    "hi": f"मिट्टी की नमी पर्याप्त है ({moisture}%)। निगरानी जारी रखें।",
-                    "mr": f"मातीची आर्द्रता पुरेशी आहे ({moisture}%). निरीक्षण सुरू ठेवा."
-                }.get(language, f"Soil moisture adequate ({moisture}%)."),
-                "timing": "Check again in 2-3 days",
-                "amount": "N/A"
-            }
+            action = "monitor"
         
-        return advice
+        urgency, timing, amount = self.IRRIGATION_PLANS[action]
+        template = self.IRRIGATION_MESSAGES.get((action, language)) or self.IRRIGATION_FALLBACK_MESSAGES[action]
+        return {
+            "action": action,
+            "urgency": urgency,
+            "message": template.format(moisture=moisture),
+            "timing": timing,
+            "amount": amount
+        }
     
     def _get_weather_icon(self, description: str) -> str:
         """Get weather emoji icon."""
-        description = description.lower()
-        if "rain" in description:
-            return "🌧️"
-        elif "thunder" in description:
-            return "⛈️"
-        elif "cloud" in description:
-            return "☁️"
-        elif "sun" in description or "clear" in description:
-            return "☀️"
-        elif "hot" in description or "heat" in description:
-            return "🌡️"
-        return "🌤️"
+        return _weather_icon(description)
     
     def _get_alert_icon(self, severity: str) -> str:
         """Get alert emoji icon."""
-        icons = {
-            "critical": "🚨",
-            "high": "⚠️",
-            "medium": "⚡",
-            "low": "ℹ️"
-        }
-        return icons.get(severity, "📢")
+        return self.ALERT_ICONS.get(severity, "📢")
     
     def _get_alert_color(self, severity: str) -> str:
         """Get alert color."""
-        colors = {
-            "critical": "#FF0000",
-            "high": "#FF6600",
-            "medium": "#FFCC00",
-            "low": "#00CC00"
-        }
-        return colors.get(severity, "#888888")
+        return self.ALERT_COLORS.get(severity, "#888888")
@@ -1,15 +1,76 @@
 """
 Satellite Agent - Analyzes crop coverage and health from satellite imagery.
 """
-import random
-import math
-from typing import Dict, Any, List
+from bisect import bisect_right
+from collections import OrderedDict
+from typing import AbstractSet, Callable, Dict, Any, List, NamedTuple, Optional, Sequence, Tuple
 from datetime import datetime, timedelta
-from .base_agent import BaseAgent
-import sys
-sys.path.append('..')
+import numpy as np
+from .base_agent import BaseAgent, round_half_up
 from config import config
 
+try:
+    import numba
+    _NUMBA_AVAILABLE = True
+except ImportError:  # Optional accelerator; NumPy is used without it
+    numba = None
+    _NUMBA_AVAILABLE = False
+
+# Random source for the simulated imagery; seed it for reproducible output
+_rng = np.random.default_rng()
+
+# A pre-drawn stream of uniform [0, 1) samples for one request
+_Draw = Callable[[], float]
+
+
+def _interval_labels(ranges: Dict[str, Tuple[float, float]]) -> Tuple[Tuple[float, ...], Tuple[str, ...]]:
+    """
+    Turn contiguous {category: (min, max)} ranges into bisect tables.
+    
+    Returns the sorted boundaries and one display label per gap, with
+    "Unknown" below the first and from the last boundary up.
+    """
+    ordered = sorted(ranges.items(), key=lambda item: item[1][0])
+    bounds = tuple(low for _, (low, _) in ordered) + (ordered[-1][1][1],)
+    labels = ("Unknown",) + tuple(category.replace("_", " ").title() for category, _ in ordered) + ("Unknown",)
+    return bounds, labels
+
+
+class _NdviProfile(NamedTuple):
+    """A crop's healthy NDVI range plus the constants derived from it."""
+    low: float
+    high: float
+    peak_month: int
+    mid: float
+    inv_range: float  # 1 / (high - low), so scoring multiplies
+
+
+def _ndvi_profile(info: Dict[str, float]) -> _NdviProfile:
+    """Resolve one CROP_NDVI_OPTIMAL entry into an _NdviProfile."""
+    low, high = info["min"], info["max"]
+    return _NdviProfile(low, high, info["peak_month"], (low + high) / 2, 1.0 / (high - low))
+
+
+def _batch_health_scores_numpy(ndvi, mid, inv_range, noise):
+    """Array counterpart of `_calculate_health_score` with pre-drawn noise."""
+    score = (100 - np.abs(ndvi - mid) * inv_range * 50 + noise).astype(np.int64)
+    return np.clip(score, 0, 100, out=score)
+
+
+if _NUMBA_AVAILABLE:
+    @numba.njit("int64[:](float64[:], float64[:], float64[:], float64[:])", parallel=True, cache=True)
+    def _batch_health_scores(ndvi, mid, inv_range, noise):
+        """Parallel loop form of `_batch_health_scores_numpy`."""
+        n = ndvi.shape[0]
+        out = np.empty(n, dtype=np.int64)
+        for i in numba.prange(n):
+            score = int(100 - abs(ndvi[i] - mid[i]) * inv_range[i] * 50 + noise[i])
+            out[i] = min(100, max(0, score))
+        return out
+else:
+    _batch_health_scores = _batch_health_scores_numpy
+
+
 class SatelliteAgent(BaseAgent):
     """Agent responsible for satellite imagery analysis and crop health assessment."""
     
@@ -21,6 +82,62 @@ class SatelliteAgent(BaseAgent):
         "dense_vegetation": (0.4, 0.6),
         "very_dense_vegetation": (0.6, 1.0)
     }
+    _NDVI_BOUNDS, _NDVI_LABELS = _interval_labels(NDVI_THRESHOLDS)
+    
+    # Health status by score; a score on a threshold takes the higher status
+    HEALTH_STATUS_THRESHOLDS = (20, 40, 60, 80)
+    HEALTH_STATUSES = ("critical", "poor", "moderate", "good", "excellent")
+    
+    # Simulated total agricultural area by state (in hectares)
+    STATE_AGRICULTURAL_AREAS = {
+        "Maharashtra": 22500000,
+        "Punjab": 4200000,
+        "Uttar Pradesh": 17500000,
+        "Madhya Pradesh": 15000000,
+        "Karnataka": 10200000,
+        "Gujarat": 9800000,
+        "Rajasthan": 21000000,
+        "Tamil Nadu": 5800000,
+        "Andhra Pradesh": 7500000,
+        "West Bengal": 5400000,
+    }
+    DEFAULT_AGRICULTURAL_AREA = 10000000
+    
+    # Simplified growth stage calendar: (start month, end month, stage)
+    GROWTH_STAGES = {
+        "Rice": {
+            "Kharif": (
+                (6, 7, "Sowing/Transplanting"),
+                (7, 8, "Tillering"),
+                (8, 9, "Panicle Initiation"),
+                (9, 10, "Flowering"),
+                (10, 11, "Grain Filling"),
+                (11, 12, "Maturity/Harvest")
+            )
+        },
+        "Wheat": {
+            "Rabi": (
+                (11, 12, "Sowing"),
+                (12, 1, "Crown Root Initiation"),
+                (1, 2, "Tillering"),
+                (2, 3, "Jointing"),
+                (3, 4, "Heading/Flowering"),
+                (4, 5, "Grain Filling/Harvest")
+            )
+        }
+    }
+    
+    # Sections callers may leave out of the analysis via task["fields"]
+    OPTIONAL_SECTIONS = frozenset({"coverage", "stress_analysis", "growth_stage", "historical_comparison"})
+    
+    # Simulated analyses are reused per (location, crop, day, sections)
+    ANALYSIS_CACHE_SIZE = 1024
+    
+    # Severity choices for detected stress, mildest first
+    STRESS_SEVERITIES = ("low", "medium", "high")
+    
+    # Upper bound on random samples one analysis consumes, drawn in one call
+    RANDOM_DRAWS = 20
     
     # Crop-specific healthy NDVI ranges
     CROP_NDVI_OPTIMAL = {
@@ -32,31 +149,54 @@ class SatelliteAgent(BaseAgent):
         "Maize": {"min": 0.4, "max": 0.7, "peak_month": 8},
         "Groundnut": {"min": 0.3, "max": 0.55, "peak_month": 9},
     }
+    DEFAULT_NDVI_OPTIMAL = {"min": 0.35, "max": 0.65, "peak_month": 8}
+    _NDVI_PROFILES = {crop: _ndvi_profile(info) for crop, info in CROP_NDVI_OPTIMAL.items()}
+    _DEFAULT_NDVI_PROFILE = _ndvi_profile(DEFAULT_NDVI_OPTIMAL)
+    
+    # Batch path: profiles as a (crop id, field) table, last row the default
+    _CROP_ID = {crop: i for i, crop in enumerate(CROP_NDVI_OPTIMAL)}
+    _DEFAULT_CROP_ID = len(CROP_NDVI_OPTIMAL)
+    _PROFILE_TABLE = np.array(list(_NDVI_PROFILES.values()) + [_DEFAULT_NDVI_PROFILE], dtype=np.float64)
+    
+    # One row per task from `analyze_batch`
+    BATCH_DTYPE = np.dtype([
+        ("ndvi", np.float64),
+        ("ndvi_status", "U13"),
+        ("interpretation", "U21"),
+        ("health_score", np.int16),
+        ("health_status", "U9"),
+    ])
+    
+    # Fixed capability list, shared rather than rebuilt per call
+    CAPABILITIES = (
+        "calculate_ndvi",
+        "assess_crop_health",
+        "detect_crop_coverage",
+        "identify_stress_areas",
+        "track_growth_stages",
+        "detect_anomalies"
+    )
     
     def __init__(self):
         super().__init__("SatelliteAgent")
+        self._analysis_cache: OrderedDict = OrderedDict()
     
-    def get_capabilities(self) -> list:
-        return [
-            "calculate_ndvi",
-            "assess_crop_health",
-            "detect_crop_coverage",
-            "identify_stress_areas",
-            "track_growth_stages",
-            "detect_anomalies"
-        ]
+    def get_capabilities(self) -> tuple:
+        return self.CAPABILITIES
     
     async def execute(self, task: Dict[str, Any]) -> Dict[str, Any]:
         """
         Execute satellite imagery analysis task.
         
         Args:
-            task: Contains 'state', 'crop', 'district' for location
+            task: Contains 'state', 'crop', 'district' for location, and
+                optionally 'fields', a set of OPTIONAL_SECTIONS to include
+                (all of them when omitted)
             
         Returns:
             Satellite analysis data including NDVI, crop health, and coverage
         """
-        self.log_activity(f"Analyzing satellite data for {task.get('state', 'Unknown')}")
+        self.log_activity("Analyzing satellite data for %s", task.get('state', 'Unknown'))
         self._record_execution()
         
         state = task.get("state", "Maharashtra")
@@ -64,6 +204,7 @@ class SatelliteAgent(BaseAgent):
         district = task.get("district")
         lat = task.get("lat")
         lon = task.get("lon")
+        fields = task.get("fields")
         
         # Get coordinates from config if not provided
         if not lat or not lon:
@@ -71,165 +212,204 @@ class SatelliteAgent(BaseAgent):
             lat = state_data["lat"]
             lon = state_data["lon"]
         
+        # The simulated imagery only changes day to day, so repeated requests
+        # reuse the day's analysis with a fresh timestamp
+        now = datetime.now()
+        key = (state, crop, round(lat, 2), round(lon, 2), now.toordinal(),
+               None if fields is None else frozenset(fields))
+        cached = self._analysis_cache.get(key)
+        if cached is not None:
+            self._analysis_cache.move_to_end(key)
+            return {**cached, "timestamp": now.isoformat()}
+        
         # Generate realistic satellite analysis data
-        satellite_data = self._generate_satellite_analysis(state, crop, lat, lon)
+        satellite_data = self._generate_satellite_analysis(state, crop, lat, lon, now, fields)
+        
+        self._analysis_cache[key] = satellite_data
+        if len(self._analysis_cache) > self.ANALYSIS_CACHE_SIZE:
+            self._analysis_cache.popitem(last=False)
         
         return satellite_data
     
-    def _generate_satellite_analysis(self, state: str, crop: str, lat: float, lon: float) -> Dict[str, Any]:
-        """Generate realistic satellite imagery analysis data."""
+    def _generate_satellite_analysis(self, state: str, crop: str, lat: float, lon: float, now: datetime,
+                                     fields: Optional[AbstractSet[str]] = None) -> Dict[str, Any]:
+        """
+        Generate realistic satellite imagery analysis data as of `now`.
+        
+        Optional sections not in `fields` are skipped entirely; None means
+        all of them.
+        """
         
-        current_month = datetime.now().month
-        crop_info = self.CROP_NDVI_OPTIMAL.get(crop, {"min": 0.35, "max": 0.65, "peak_month": 8})
+        current_month = now.month
+        profile = self._NDVI_PROFILES.get(crop, self._DEFAULT_NDVI_PROFILE)
+        
+        draw = iter(_rng.random(self.RANDOM_DRAWS).tolist()).__next__
         
         # Calculate NDVI based on growth stage
-        months_from_peak = abs(current_month - crop_info["peak_month"])
+        months_from_peak = abs(current_month - profile.peak_month)
         if months_from_peak > 6:
             months_from_peak = 12 - months_from_peak
         
         # NDVI varies with growth stage
         growth_factor = 1 - (months_from_peak / 6) * 0.4
-        base_ndvi = (crop_info["min"] + crop_info["max"]) / 2
-        ndvi = base_ndvi * growth_factor + random.uniform(-0.1, 0.1)
+        ndvi = profile.mid * growth_factor + (0.2 * draw() - 0.1)
         ndvi = max(0.1, min(0.9, ndvi))  # Clamp to valid range
         
         # Calculate health score based on NDVI and optimal range
-        health_score = self._calculate_health_score(ndvi, crop_info)
+        health_score = self._calculate_health_score(ndvi, profile, draw)
+        
+        analysis = {
+            "ndvi": {
+                "current": round_half_up(ndvi, 1000),
+                "interpretation": self._interpret_ndvi(ndvi),
+                "optimal_range": {"min": profile.low, "max": profile.high},
+                "status": self._get_ndvi_status(ndvi, profile)
+            },
+            "health_score": health_score,
+            "health_status": self._get_health_status(health_score)
+        }
         
         # Generate coverage data
-        coverage = self._generate_coverage_data(state, crop, ndvi)
+        if fields is None or "coverage" in fields:
+            analysis["coverage"] = self._generate_coverage_data(state, crop, ndvi, draw)
         
         # Detect stress areas
-        stress_analysis = self._detect_stress_areas(ndvi, health_score, state)
+        if fields is None or "stress_analysis" in fields:
+            analysis["stress_analysis"] = self._detect_stress_areas(ndvi, health_score, state, draw)
+        
+        if fields is None or "growth_stage" in fields:
+            analysis["growth_stage"] = self._determine_growth_stage(crop, current_month, draw)
         
         # Historical comparison
-        historical = self._generate_historical_comparison(crop, ndvi)
+        if fields is None or "historical_comparison" in fields:
+            analysis["historical_comparison"] = self._generate_historical_comparison(crop, ndvi, draw)
         
-        return {
-            "ndvi": {
-                "current": round(ndvi, 3),
-                "interpretation": self._interpret_ndvi(ndvi),
-                "optimal_range": {"min": crop_info["min"], "max": crop_info["max"]},
-                "status": self._get_ndvi_status(ndvi, crop_info)
-            },
-            "health_score": health_score,
-            "health_status": self._get_health_status(health_score),
-            "coverage": coverage,
-            "stress_analysis": stress_analysis,
-            "growth_stage": self._determine_growth_stage(crop, current_month),
-            "historical_comparison": historical,
-            "imagery_date": (datetime.now() - timedelta(days=random.randint(1, 5))).isoformat(),
+        analysis.update({
+            "imagery_date": (now - timedelta(days=1 + int(5 * draw()))).isoformat(),
             "satellite_source": "Sentinel-2 (simulated)",
             "resolution": "10m",
-            "cloud_cover": round(random.uniform(0, 25), 1),
+            "cloud_cover": round_half_up(25 * draw(), 10),
             "coordinates": {"lat": lat, "lon": lon},
-            "timestamp": datetime.now().isoformat(),
+            "timestamp": now.isoformat(),
             "data_source": "simulated"
-        }
+        })
+        return analysis
+    
+    def analyze_batch(self, tasks: Sequence[Dict[str, Any]]) -> np.ndarray:
+        """
+        Score NDVI and crop health for many (state, crop) tasks at once.
+        
+        Covers the numeric core of `execute` (NDVI, its status and
+        interpretation, health score and status) without the per-task
+        coverage, stress and history sections.
+        
+        Args:
+            tasks: Sequence of task dicts shaped like `execute` input
+            
+        Returns:
+            Structured array with one BATCH_DTYPE row per task
+        """
+        self._record_execution()
+        n = len(tasks)
+        crop_ids = np.array(
+            [self._CROP_ID.get(t.get("crop", "Rice"), self._DEFAULT_CROP_ID) for t in tasks], dtype=np.intp
+        )
+        low, high, peak_month, mid, inv_range = self._PROFILE_TABLE[crop_ids].T
+        
+        # Same growth-stage model as the scalar path
+        months_from_peak = np.abs(datetime.now().month - peak_month)
+        months_from_peak = np.where(months_from_peak > 6, 12 - months_from_peak, months_from_peak)
+        ndvi = mid * (1 - (months_from_peak / 6) * 0.4) + _rng.uniform(-0.1, 0.1, n)
+        np.clip(ndvi, 0.1, 0.9, out=ndvi)
+        
+        # Health scores (parallel numba loop when available)
+        health_score = _batch_health_scores(ndvi, mid, inv_range, _rng.uniform(-5, 5, n))
+        
+        out = np.empty(n, dtype=self.BATCH_DTYPE)
+        np.round(ndvi, 3, out=out["ndvi"])
+        out["ndvi_status"] = np.where(ndvi < low, "below_optimal", np.where(ndvi > high, "above_optimal", "optimal"))
+        out["interpretation"] = np.array(self._NDVI_LABELS)[np.searchsorted(self._NDVI_BOUNDS, ndvi, side="right")]
+        out["health_score"] = health_score
+        out["health_status"] = np.array(self.HEALTH_STATUSES)[
+            np.searchsorted(self.HEALTH_STATUS_THRESHOLDS, health_score, side="right")
+        ]
+        return out
     
     def _interpret_ndvi(self, ndvi: float) -> str:
         """Interpret NDVI value."""
-        for category, (min_val, max_val) in self.NDVI_THRESHOLDS.items():
-            if min_val <= ndvi < max_val:
-                return category.replace("_", " ").title()
-        return "Unknown"
+        return self._NDVI_LABELS[bisect_right(self._NDVI_BOUNDS, ndvi)]
     
-    def _get_ndvi_status(self, ndvi: float, crop_info: Dict) -> str:
+    def _get_ndvi_status(self, ndvi: float, profile: _NdviProfile) -> str:
         """Get NDVI status relative to optimal range."""
-        if ndvi < crop_info["min"]:
+        if ndvi < profile.low:
             return "below_optimal"
-        elif ndvi > crop_info["max"]:
+        elif ndvi > profile.high:
             return "above_optimal"
         return "optimal"
     
-    def _calculate_health_score(self, ndvi: float, crop_info: Dict) -> int:
+    def _calculate_health_score(self, ndvi: float, profile: _NdviProfile, draw: _Draw) -> int:
         """Calculate crop health score (0-100)."""
-        optimal_mid = (crop_info["min"] + crop_info["max"]) / 2
-        optimal_range = crop_info["max"] - crop_info["min"]
-        
         # Calculate deviation from optimal
-        deviation = abs(ndvi - optimal_mid) / optimal_range
+        deviation = abs(ndvi - profile.mid) * profile.inv_range
         
         # Base score
         base_score = 100 - (deviation * 50)
         
         # Add some randomness
-        score = base_score + random.uniform(-5, 5)
+        score = base_score + (10 * draw() - 5)
         
         return max(0, min(100, int(score)))
     
     def _get_health_status(self, score: int) -> str:
         """Get health status from score."""
-        if score >= 80:
-            return "excellent"
-        elif score >= 60:
-            return "good"
-        elif score >= 40:
-            return "moderate"
-        elif score >= 20:
-            return "poor"
-        return "critical"
+        return self.HEALTH_STATUSES[bisect_right(self.HEALTH_STATUS_THRESHOLDS, score)]
     
-    def _generate_coverage_data(self, state: str, crop: str, ndvi: float) -> Dict[str, Any]:
+    def _generate_coverage_data(self, state: str, crop: str, ndvi: float, draw: _Draw) -> Dict[str, Any]:
         """Generate crop coverage data."""
-        # Simulated total agricultural area (in hectares)
-        state_areas = {
-            "Maharashtra": 22500000,
-            "Punjab": 4200000,
-            "Uttar Pradesh": 17500000,
-            "Madhya Pradesh": 15000000,
-            "Karnataka": 10200000,
-            "Gujarat": 9800000,
-            "Rajasthan": 21000000,
-            "Tamil Nadu": 5800000,
-            "Andhra Pradesh": 7500000,
-            "West Bengal": 5400000,
-        }
-        
-        total_area = state_areas.get(state, 10000000)
-        crop_area = total_area * random.uniform(0.1, 0.25)  # Portion under this crop
+        total_area = self.STATE_AGRICULTURAL_AREAS.get(state, self.DEFAULT_AGRICULTURAL_AREA)
+        crop_area = total_area * (0.1 + 0.15 * draw())  # Portion under this crop
         
         # Healthy area based on NDVI
-        healthy_percentage = min(95, max(40, ndvi * 100 + random.uniform(10, 20)))
+        healthy_percentage = min(95, max(40, ndvi * 100 + (10 + 10 * draw())))
         
         return {
-            "total_agricultural_area": round(total_area / 100000, 2),  # In lakh hectares
+            "total_agricultural_area": round_half_up(total_area / 100000, 100),  # In lakh hectares
             "total_agricultural_area_unit": "lakh hectares",
-            "crop_area": round(crop_area / 100000, 2),
+            "crop_area": round_half_up(crop_area / 100000, 100),
             "crop_area_unit": "lakh hectares",
-            "healthy_area_percentage": round(healthy_percentage, 1),
-            "stressed_area_percentage": round(100 - healthy_percentage, 1),
-            "fallow_land_percentage": round(random.uniform(5, 15), 1)
+            "healthy_area_percentage": round_half_up(healthy_percentage, 10),
+            "stressed_area_percentage": round_half_up(100 - healthy_percentage, 10),
+            "fallow_land_percentage": round_half_up(5 + 10 * draw(), 10)
         }
     
-    def _detect_stress_areas(self, ndvi: float, health_score: int, state: str) -> Dict[str, Any]:
+    def _detect_stress_areas(self, ndvi: float, health_score: int, state: str, draw: _Draw) -> Dict[str, Any]:
         """Detect crop stress areas."""
         stress_types = []
         
         # Water stress
-        if random.random() > 0.6:
+        if draw() > 0.6:
             stress_types.append({
                 "type": "water_stress",
-                "severity": random.choice(["low", "medium", "high"]),
-                "affected_area_percentage": round(random.uniform(5, 25), 1),
+                "severity": self.STRESS_SEVERITIES[int(3 * draw())],
+                "affected_area_percentage": round_half_up(5 + 20 * draw(), 10),
                 "description": "Areas showing signs of water stress"
             })
         
         # Nutrient deficiency
-        if random.random() > 0.7:
+        if draw() > 0.7:
             stress_types.append({
                 "type": "nutrient_deficiency",
-                "severity": random.choice(["low", "medium"]),
-                "affected_area_percentage": round(random.uniform(3, 15), 1),
+                "severity": self.STRESS_SEVERITIES[int(2 * draw())],
+                "affected_area_percentage": round_half_up(3 + 12 * draw(), 10),
                 "description": "Possible nutrient deficiency detected"
             })
         
         # Pest/Disease indicators
-        if random.random() > 0.8 and health_score < 70:
+        if draw() > 0.8 and health_score < 70:
             stress_types.append({
                 "type": "pest_disease_risk",
                 "severity": "medium",
-                "affected_area_percentage": round(random.uniform(2, 10), 1),
+                "affected_area_percentage": round_half_up(2 + 8 * draw(), 10),
                 "description": "Unusual patterns suggesting pest or disease pressure"
             })
         
@@ -261,47 +441,23 @@ class SatelliteAgent(BaseAgent):
             return "medium"
         return "low"
     
-    def _determine_growth_stage(self, crop: str, month: int) -> Dict[str, Any]:
+    def _determine_growth_stage(self, crop: str, month: int, draw: _Draw) -> Dict[str, Any]:
         """Determine crop growth stage based on typical calendar."""
-        # Simplified growth stage mapping
-        growth_stages = {
-            "Rice": {
-                "Kharif": [
-                    (6, 7, "Sowing/Transplanting"),
-                    (7, 8, "Tillering"),
-                    (8, 9, "Panicle Initiation"),
-                    (9, 10, "Flowering"),
-                    (10, 11, "Grain Filling"),
-                    (11, 12, "Maturity/Harvest")
-                ]
-            },
-            "Wheat": {
-                "Rabi": [
-                    (11, 12, "Sowing"),
-                    (12, 1, "Crown Root Initiation"),
-                    (1, 2, "Tillering"),
-                    (2, 3, "Jointing"),
-                    (3, 4, "Heading/Flowering"),
-                    (4, 5, "Grain Filling/Harvest")
-                ]
-            }
-        }
-        
-        # Default growth stage info
+        # Default growth stage info (GROWTH_STAGES is not consulted yet)
         stage_info = {
             "current_stage": "Active Growth",
-            "days_in_stage": random.randint(10, 30),
-            "expected_days_remaining": random.randint(15, 45),
+            "days_in_stage": 10 + int(21 * draw()),
+            "expected_days_remaining": 15 + int(31 * draw()),
             "next_stage": "Maturation"
         }
         
         return stage_info
     
-    def _generate_historical_comparison(self, crop: str, current_ndvi: float) -> Dict[str, Any]:
+    def _generate_historical_comparison(self, crop: str, current_ndvi: float, draw: _Draw) -> Dict[str, Any]:
         """Generate historical comparison data."""
         # Generate historical NDVI values (simulated)
         years = [2023, 2024, 2025]
-        historical_ndvi = [current_ndvi + random.uniform(-0.15, 0.1) for _ in years]
+        historical_ndvi = [current_ndvi + (0.25 * draw() - 0.15) for _ in years]
         
         avg_historical = sum(historical_ndvi) / len(historical_ndvi)
         deviation = ((current_ndvi - avg_historical) / avg_historical) * 100
@@ -1,13 +1,27 @@
 """
 Soil Agent - Manages soil data including moisture, pH, and NPK nutrients.
 """
-import random
-from typing import Dict, Any
+from collections import OrderedDict
+from typing import Callable, Dict, Any, Optional, Tuple
 from datetime import datetime
-from .base_agent import BaseAgent
-import sys
-sys.path.append('..')
-from config import config
+import numpy as np
+from .base_agent import BaseAgent, round_half_up
+
+# Random source for the simulated readings; seed it for reproducible output
+_rng = np.random.default_rng()
+
+# A pre-drawn stream of uniform [0, 1) samples for one request
+_Draw = Callable[[], float]
+
+
+def _soil_factors(soil_types: Dict[str, Dict[str, Any]], moisture_bases: Dict[str, float],
+                  fertility_multipliers: Dict[str, float]) -> Dict[str, Tuple[float, float]]:
+    """Resolve each soil type to its (moisture base, fertility multiplier)."""
+    return {
+        soil: (moisture_bases[info["moisture_retention"]], fertility_multipliers[info["fertility"]])
+        for soil, info in soil_types.items()
+    }
+
 
 class SoilAgent(BaseAgent):
     """Agent responsible for soil data analysis and recommendations."""
@@ -22,6 +36,17 @@ class SoilAgent(BaseAgent):
         "Mountain": {"ph_range": (5.5, 7.5), "moisture_retention": "medium", "fertility": "medium"},
     }
     
+    # Simulated baseline moisture (%) by retention, and NPK scaling by fertility
+    MOISTURE_BASE_BY_RETENTION = {
+        "very_high": 70,
+        "high": 55,
+        "medium": 40,
+        "low": 25,
+        "very_low": 15
+    }
+    FERTILITY_MULTIPLIERS = {"high": 1.2, "medium": 1.0, "low": 0.7}
+    _SOIL_FACTORS = _soil_factors(SOIL_TYPES, MOISTURE_BASE_BY_RETENTION, FERTILITY_MULTIPLIERS)
+    
     # Predominant soil types by state
     STATE_SOIL_MAP = {
         "Maharashtra": ["Black (Regur)", "Alluvial", "Laterite"],
@@ -35,19 +60,60 @@ class SoilAgent(BaseAgent):
         "Andhra Pradesh": ["Red", "Black (Regur)", "Alluvial"],
         "West Bengal": ["Alluvial", "Laterite"],
     }
+    DEFAULT_SOIL_TYPES = ["Alluvial"]
+    
+    # Optimal moisture (%) and pH ranges by crop
+    OPTIMAL_MOISTURE = {
+        "Rice": {"min": 60, "max": 80},
+        "Wheat": {"min": 40, "max": 60},
+        "Cotton": {"min": 35, "max": 55},
+        "Sugarcane": {"min": 55, "max": 75},
+        "Soybean": {"min": 45, "max": 65},
+        "Maize": {"min": 40, "max": 60},
+        "Groundnut": {"min": 35, "max": 50},
+    }
+    DEFAULT_OPTIMAL_MOISTURE = {"min": 40, "max": 60}
+    OPTIMAL_PH = {
+        "Rice": {"min": 5.5, "max": 7.0},
+        "Wheat": {"min": 6.0, "max": 7.5},
+        "Cotton": {"min": 6.0, "max": 8.0},
+        "Sugarcane": {"min": 6.0, "max": 7.5},
+        "Soybean": {"min": 6.0, "max": 7.0},
+        "Maize": {"min": 5.8, "max": 7.0},
+        "Groundnut": {"min": 5.5, "max": 7.0},
+    }
+    DEFAULT_OPTIMAL_PH = {"min": 6.0, "max": 7.5}
+    
+    # Nutrient (kg/ha) bounds between deficient/adequate/sufficient
+    NUTRIENT_THRESHOLDS = {
+        "nitrogen": {"low": 180, "high": 250},
+        "phosphorus": {"low": 20, "high": 40},
+        "potassium": {"low": 150, "high": 220}
+    }
+    DEFAULT_NUTRIENT_THRESHOLD = {"low": 100, "high": 200}
+    
+    # Simulated readings are reused per (state, crop, season, day)
+    READING_CACHE_SIZE = 1024
+    
+    # Random samples one soil reading consumes, drawn in one call
+    RANDOM_DRAWS = 8
+    
+    # Fixed capability list, shared rather than rebuilt per call
+    CAPABILITIES = (
+        "analyze_soil_moisture",
+        "measure_soil_ph",
+        "analyze_npk_nutrients",
+        "classify_soil_type",
+        "recommend_fertilizers",
+        "assess_soil_health"
+    )
     
     def __init__(self):
         super().__init__("SoilAgent")
+        self._reading_cache: OrderedDict = OrderedDict()
     
-    def get_capabilities(self) -> list:
-        return [
-            "analyze_soil_moisture",
-            "measure_soil_ph",
-            "analyze_npk_nutrients",
-            "classify_soil_type",
-            "recommend_fertilizers",
-            "assess_soil_health"
-        ]
+    def get_capabilities(self) -> tuple:
+        return self.CAPABILITIES
     
     async def execute(self, task: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -59,24 +125,40 @@ class SoilAgent(BaseAgent):
         Returns:
             Soil analysis data including moisture, pH, and NPK levels
         """
-        self.log_activity(f"Analyzing soil for {task.get('state', 'Unknown')}")
+        self.log_activity("Analyzing soil for %s", task.get('state', 'Unknown'))
         self._record_execution()
         
         state = task.get("state", "Maharashtra")
         crop = task.get("crop", "Rice")
-        season = task.get("season", self._get_current_season())
+        now = datetime.now()
+        season = task.get("season")
+        if season is None:
+            season = self._get_current_season(now.month)
+        
+        # Simulated soil only changes day to day, so repeated requests reuse
+        # the day's reading and recommendations with a fresh timestamp
+        key = (state, crop, season, now.toordinal())
+        cached = self._reading_cache.get(key)
+        if cached is not None:
+            self._reading_cache.move_to_end(key)
+            return {**cached, "timestamp": now.isoformat()}
         
         # Get soil data (simulated with realistic patterns)
-        soil_data = self._generate_soil_data(state, crop, season)
+        soil_data = self._generate_soil_data(state, crop, season, now)
         
         # Add recommendations based on soil conditions
         soil_data["recommendations"] = self._generate_recommendations(soil_data, crop)
         
+        self._reading_cache[key] = soil_data
+        if len(self._reading_cache) > self.READING_CACHE_SIZE:
+            self._reading_cache.popitem(last=False)
+        
         return soil_data
     
-    def _get_current_season(self) -> str:
-        """Determine current agricultural season in India."""
-        month = datetime.now().month
+    def _get_current_season(self, month: Optional[int] = None) -> str:
+        """Determine the agricultural season in India for `month` (default: now)."""
+        if month is None:
+            month = datetime.now().month
         if month in [6, 7, 8, 9, 10]:
             return "Kharif"  # Monsoon season crops
         elif month in [11, 12, 1, 2, 3]:
@@ -84,26 +166,21 @@ class SoilAgent(BaseAgent):
         else:
             return "Zaid"  # Summer season crops
     
-    def _generate_soil_data(self, state: str, crop: str, season: str) -> Dict[str, Any]:
-        """Generate realistic soil data based on state and conditions."""
+    def _generate_soil_data(self, state: str, crop: str, season: str, now: datetime) -> Dict[str, Any]:
+        """Generate realistic soil data based on state and conditions as of `now`."""
         
         # Get predominant soil types for the state
-        soil_types = self.STATE_SOIL_MAP.get(state, ["Alluvial"])
+        soil_types = self.STATE_SOIL_MAP.get(state, self.DEFAULT_SOIL_TYPES)
         primary_soil = soil_types[0]
         soil_info = self.SOIL_TYPES[primary_soil]
+        draw = iter(_rng.random(self.RANDOM_DRAWS).tolist()).__next__
         
         # Generate pH based on soil type
         ph_min, ph_max = soil_info["ph_range"]
-        ph = round(random.uniform(ph_min, ph_max), 1)
+        ph = round_half_up(ph_min + (ph_max - ph_min) * draw(), 10)
         
         # Generate moisture based on season and soil type
-        moisture_base = {
-            "very_high": 70,
-            "high": 55,
-            "medium": 40,
-            "low": 25,
-            "very_low": 15
-        }[soil_info["moisture_retention"]]
+        moisture_base, fertility_multiplier = self._SOIL_FACTORS[primary_soil]
         
         # Adjust for season
         if season == "Kharif":
@@ -111,141 +188,120 @@ class SoilAgent(BaseAgent):
         elif season == "Zaid":
             moisture_base -= 10
         
-        moisture = min(95, max(10, moisture_base + random.uniform(-10, 10)))
+        moisture = min(95, max(10, moisture_base + (20 * draw() - 10)))
         
         # Generate NPK levels
-        fertility_multiplier = {"high": 1.2, "medium": 1.0, "low": 0.7}[soil_info["fertility"]]
-        
         npk = {
-            "nitrogen": round(random.uniform(150, 280) * fertility_multiplier, 1),  # kg/ha
-            "phosphorus": round(random.uniform(10, 50) * fertility_multiplier, 1),  # kg/ha
-            "potassium": round(random.uniform(100, 250) * fertility_multiplier, 1),  # kg/ha
+            "nitrogen": round_half_up((150 + 130 * draw()) * fertility_multiplier, 10),  # kg/ha
+            "phosphorus": round_half_up((10 + 40 * draw()) * fertility_multiplier, 10),  # kg/ha
+            "potassium": round_half_up((100 + 150 * draw()) * fertility_multiplier, 10),  # kg/ha
         }
         
+        # Classify each reading once against the crop's optima
+        optimal_moisture = self._get_optimal_moisture(crop)
+        optimal_ph = self._get_optimal_ph(crop)
+        moisture_status = self._get_moisture_status(moisture, optimal_moisture)
+        ph_status = self._get_ph_status(ph, optimal_ph)
+        nutrient_status = {nutrient: self._get_nutrient_status(value, nutrient) for nutrient, value in npk.items()}
+        
         # Soil health score (0-100)
-        health_score = self._calculate_soil_health(ph, moisture, npk, crop)
+        health_score = self._calculate_soil_health(ph_status, moisture_status, nutrient_status, draw)
         
         return {
             "soil_type": primary_soil,
             "all_soil_types": soil_types,
             "moisture": {
-                "current": round(moisture, 1),
-                "optimal_range": self._get_optimal_moisture(crop),
-                "status": self._get_moisture_status(moisture, crop)
+                "current": round_half_up(moisture, 10),
+                "optimal_range": dict(optimal_moisture),
+                "status": moisture_status
             },
             "ph": {
                 "current": ph,
-                "optimal_range": self._get_optimal_ph(crop),
-                "status": self._get_ph_status(ph, crop)
+                "optimal_range": dict(optimal_ph),
+                "status": ph_status
             },
             "npk": {
                 "nitrogen": {
                     "current": npk["nitrogen"],
                     "unit": "kg/ha",
-                    "status": self._get_nutrient_status(npk["nitrogen"], "nitrogen", crop)
+                    "status": nutrient_status["nitrogen"]
                 },
                 "phosphorus": {
                     "current": npk["phosphorus"],
                     "unit": "kg/ha", 
-                    "status": self._get_nutrient_status(npk["phosphorus"], "phosphorus", crop)
+                    "status": nutrient_status["phosphorus"]
                 },
                 "potassium": {
                     "current": npk["potassium"],
                     "unit": "kg/ha",
-                    "status": self._get_nutrient_status(npk["potassium"], "potassium", crop)
+                    "status": nutrient_status["potassium"]
                 }
             },
             "health_score": health_score,
-            "organic_carbon": round(random.uniform(0.3, 1.5), 2),
-            "electrical_conductivity": round(random.uniform(0.1, 2.0), 2),
+            "organic_carbon": round_half_up(0.3 + 1.2 * draw(), 100),
+            "electrical_conductivity": round_half_up(0.1 + 1.9 * draw(), 100),
             "season": season,
-            "timestamp": datetime.now().isoformat(),
+            "timestamp": now.isoformat(),
             "data_source": "simulated"
         }
     
     def _get_optimal_moisture(self, crop: str) -> Dict[str, float]:
-        """Get optimal moisture range for crop."""
-        crop_moisture = {
-            "Rice": {"min": 60, "max": 80},
-            "Wheat": {"min": 40, "max": 60},
-            "Cotton": {"min": 35, "max": 55},
-            "Sugarcane": {"min": 55, "max": 75},
-            "Soybean": {"min": 45, "max": 65},
-            "Maize": {"min": 40, "max": 60},
-            "Groundnut": {"min": 35, "max": 50},
-        }
-        return crop_moisture.get(crop, {"min": 40, "max": 60})
+        """Get optimal moisture range for crop (shared; do not mutate)."""
+        return self.OPTIMAL_MOISTURE.get(crop, self.DEFAULT_OPTIMAL_MOISTURE)
     
     def _get_optimal_ph(self, crop: str) -> Dict[str, float]:
-        """Get optimal pH range for crop."""
-        crop_ph = {
-            "Rice": {"min": 5.5, "max": 7.0},
-            "Wheat": {"min": 6.0, "max": 7.5},
-            "Cotton": {"min": 6.0, "max": 8.0},
-            "Sugarcane": {"min": 6.0, "max": 7.5},
-            "Soybean": {"min": 6.0, "max": 7.0},
-            "Maize": {"min": 5.8, "max": 7.0},
-            "Groundnut": {"min": 5.5, "max": 7.0},
-        }
-        return crop_ph.get(crop, {"min": 6.0, "max": 7.5})
+        """Get optimal pH range for crop (shared; do not mutate)."""
+        return self.OPTIMAL_PH.get(crop, self.DEFAULT_OPTIMAL_PH)
     
-    def _get_moisture_status(self, moisture: float, crop: str) -> str:
-        """Determine moisture status relative to crop needs."""
-        optimal = self._get_optimal_moisture(crop)
+    def _get_moisture_status(self, moisture: float, optimal: Dict[str, float]) -> str:
+        """Determine moisture status relative to the crop's optimal range."""
         if moisture < optimal["min"]:
             return "low"
         elif moisture > optimal["max"]:
             return "high"
         return "optimal"
     
-    def _get_ph_status(self, ph: float, crop: str) -> str:
-        """Determine pH status relative to crop needs."""
-        optimal = self._get_optimal_ph(crop)
+    def _get_ph_status(self, ph: float, optimal: Dict[str, float]) -> str:
+        """Determine pH status relative to the crop's optimal range."""
         if ph < optimal["min"]:
             return "acidic"
         elif ph > optimal["max"]:
             return "alkaline"
         return "optimal"
     
-    def _get_nutrient_status(self, value: float, nutrient: str, crop: str) -> str:
+    def _get_nutrient_status(self, value: float, nutrient: str) -> str:
         """Determine nutrient status."""
-        thresholds = {
-            "nitrogen": {"low": 180, "high": 250},
-            "phosphorus": {"low": 20, "high": 40},
-            "potassium": {"low": 150, "high": 220}
-        }
-        t = thresholds.get(nutrient, {"low": 100, "high": 200})
+        t = self.NUTRIENT_THRESHOLDS.get(nutrient, self.DEFAULT_NUTRIENT_THRESHOLD)
         if value < t["low"]:
             return "deficient"
         elif value > t["high"]:
             return "sufficient"
         return "adequate"
     
-    def _calculate_soil_health(self, ph: float, moisture: float, npk: Dict, crop: str) -> int:
-        """Calculate overall soil health score."""
+    def _calculate_soil_health(self, ph_status: str, moisture_status: str,
+                               nutrient_status: Dict[str, str], draw: _Draw) -> int:
+        """Calculate overall soil health score from the already-classified readings."""
         score = 100
         
         # pH impact
-        optimal_ph = self._get_optimal_ph(crop)
-        if ph < optimal_ph["min"] or ph > optimal_ph["max"]:
+        if ph_status != "optimal":
             score -= 15
         
         # Moisture impact
-        optimal_moisture = self._get_optimal_moisture(crop)
-        if moisture < optimal_moisture["min"]:
+        if moisture_status == "low":
             score -= 20
-        elif moisture > optimal_moisture["max"]:
+        elif moisture_status == "high":
             score -= 10
         
         # Nutrient impact
-        if npk["nitrogen"] < 180:
+        if nutrient_status["nitrogen"] == "deficient":
             score -= 15
-        if npk["phosphorus"] < 20:
+        if nutrient_status["phosphorus"] == "deficient":
             score -= 10
-        if npk["potassium"] < 150:
+        if nutrient_status["potassium"] == "deficient":
             score -= 10
         
-        return max(0, min(100, score + random.randint(-5, 5)))
+        return max(0, min(100, score + (int(11 * draw()) - 5)))
     
     def _generate_recommendations(self, soil_data: Dict, crop: str) -> list:
         """Generate fertilizer and soil management recommendations."""
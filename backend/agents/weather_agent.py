@@ -1,22 +1,159 @@
 """
 Weather Agent - Fetches live weather data from OpenWeatherMap API.
 """
-import httpx
-import random
-from typing import Dict, Any
+import asyncio
+import json
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Any, Optional, Sequence, Tuple
 from datetime import datetime, timedelta
-from .base_agent import BaseAgent
+import numpy as np
+from .base_agent import BaseAgent, round_half_up
 import sys
 sys.path.append('..')
 from config import config
 
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:  # Optional faster parser; stdlib json accepts the same bytes
+    _json_loads = json.loads
+
+try:
+    import redis.asyncio as aioredis
+except ImportError:  # Optional shared cache; only the in-process cache is used without it
+    aioredis = None
+
+# Random source shared by the per-request and batch simulation paths
+_rng = np.random.default_rng()
+
+# A pre-drawn stream of uniform [0, 1) samples for one request
+_Draw = Callable[[], float]
+
+# Read-only defaults for missing response sections, so misses don't allocate
+_EMPTY: Dict[str, Any] = {}
+_NO_CONDITIONS = (_EMPTY,)
+
 class WeatherAgent(BaseAgent):
     """Agent responsible for fetching and analyzing weather data."""
     
+    # Keep-alive pool shared by every OpenWeatherMap request (httpx.Limits arguments)
+    HTTP_LIMITS = {"max_keepalive_connections": 20, "max_connections": 100}
+    
+    # Live weather is reused per rounded location for WEATHER_CACHE_TTL
+    # seconds (least recently used evicted past WEATHER_CACHE_SIZE)
+    WEATHER_CACHE_TTL = 600
+    WEATHER_CACHE_SIZE = 256
+    
+    # 3-hourly forecast entries requested; 8 cover the 24h rainfall total
+    # and the 5-entry forecast, and keep the payload (and its parse) about
+    # 5x smaller than the default 40 entries
+    FORECAST_ENTRIES = 8
+    
+    # Simulated climate by month (index 1-12): (temperature offset, monsoon)
+    MONTH_CLIMATE = (
+        None,
+        (-5, False), (-5, False),                    # Jan-Feb: winter
+        (10, False), (10, False), (10, False),       # Mar-May: summer
+        (5, True), (5, True), (5, True), (5, True),  # Jun-Sep: monsoon
+        (0, False),                                  # Oct
+        (-5, False), (-5, False)                     # Nov-Dec: winter
+    )
+    
+    # Location for tasks without coordinates whose state is missing or unknown
+    DEFAULT_STATE_DATA = config.INDIAN_STATES["Maharashtra"]
+    
+    FORECAST_DAYS = 5  # Simulated daily forecast length
+    
+    # Random samples one simulated payload consumes, drawn in one call:
+    # 7 for current conditions plus 4 per forecast day
+    RANDOM_DRAWS = 7 + 4 * FORECAST_DAYS
+    
+    # Simulated sky descriptions by conditions
+    MONSOON_DESCRIPTIONS = ("light rain", "moderate rain", "heavy rain", "thunderstorm", "overcast clouds")
+    HOT_DESCRIPTIONS = ("clear sky", "few clouds", "haze", "hot and sunny")
+    FAIR_DESCRIPTIONS = ("clear sky", "few clouds", "scattered clouds", "partly cloudy")
+    
+    # One row per task from `simulate_batch`
+    BATCH_DTYPE = np.dtype([
+        ("temperature", np.float64),
+        ("humidity", np.float64),
+        ("pressure", np.float64),
+        ("wind_speed", np.float64),
+        ("clouds", np.int16),
+        ("rainfall_24h", np.float64),
+        ("is_monsoon", np.bool_),
+        ("forecast_temperature", np.float64, (FORECAST_DAYS,)),
+        ("forecast_humidity", np.float64, (FORECAST_DAYS,)),
+        ("forecast_rain_probability", np.int16, (FORECAST_DAYS,)),
+    ])
+    
+    # Alert payloads, shared by every response that raises them (read-only)
+    LIVE_ALERTS = {
+        "heat_wave": {"type": "heat_wave", "severity": "high", "message": "Extreme heat warning"},
+        "cold_wave": {"type": "cold_wave", "severity": "high", "message": "Cold wave warning"},
+        "strong_wind": {"type": "strong_wind", "severity": "medium", "message": "Strong winds expected"},
+        "heavy_rain": {"type": "heavy_rain", "severity": "high", "message": "Heavy rainfall warning"}
+    }
+    SIMULATED_ALERTS = {
+        "heat_wave": {
+            "type": "heat_wave",
+            "severity": "high",
+            "message": "Heat wave conditions expected. Protect crops with shade nets."
+        },
+        "flood_risk": {
+            "type": "flood_risk",
+            "severity": "high",
+            "message": "Heavy rainfall may cause waterlogging. Ensure proper drainage."
+        },
+        "heavy_rain": {
+            "type": "heavy_rain",
+            "severity": "medium",
+            "message": "Moderate to heavy rain expected. Delay pesticide application."
+        }
+    }
+    
+    # Prefix for entries in the cross-worker cache (enabled by config.REDIS_URL)
+    SHARED_CACHE_PREFIX = "wx"
+    
     def __init__(self):
         super().__init__("WeatherAgent")
         self.api_key = config.OPENWEATHERMAP_API_KEY
+        self._use_real_api = bool(self.api_key) and self.api_key != "demo_key"
         self.base_url = "https://api.openweathermap.org/data/2.5"
+        self._client: Optional["httpx.AsyncClient"] = None
+        self._weather_cache: OrderedDict = OrderedDict()  # key -> (monotonic time, data)
+        self._inflight: Dict[Tuple[float, float], asyncio.Future] = {}  # key -> running fetch
+        self._redis = None
+        if config.REDIS_URL:
+            if aioredis is not None:
+                self._redis = aioredis.from_url(config.REDIS_URL)
+            else:
+                self.log_activity("REDIS_URL is set but redis is not installed; "
+                                  "weather cache is per-process only", level="warning")
+    
+    def _get_client(self) -> "httpx.AsyncClient":
+        """Return the long-lived API client, creating it on first use."""
+        if self._client is None:
+            # httpx is imported here, not at module level, so that demo mode
+            # (simulated data only) never pays its import time
+            import httpx
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                params={"appid": self.api_key, "units": "metric"},
+                timeout=config.AGENT_TIMEOUT,
+                limits=httpx.Limits(**self.HTTP_LIMITS)
+            )
+        return self._client
+    
+    async def aclose(self):
+        """Close the pooled API connections."""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+        if self._redis is not None:
+            await self._redis.aclose()
+            self._redis = None
     
     def get_capabilities(self) -> list:
         return [
@@ -32,66 +169,152 @@ class WeatherAgent(BaseAgent):
         Execute weather data fetching task.
         
         Args:
-            task: Contains 'state', 'lat', 'lon' for location
+            task: Contains 'state', 'lat', 'lon' for location; set
+                'no_cache' to bypass the live-weather cache
             
         Returns:
-            Weather data including current conditions and forecast
+            Weather data including current conditions and forecast. Nested
+            sections of live results are shared with later callers, so
+            treat them as read-only.
         """
-        self.log_activity(f"Executing weather fetch for {task.get('state', 'Unknown')}")
+        self.log_activity("Executing weather fetch for %s", task.get('state', 'Unknown'))
         self._record_execution()
         
         state = task.get("state", "Maharashtra")
+        lat, lon = self._resolve_location(task)
+        
+        # Without an API key there is nothing to try
+        if not self._use_real_api:
+            return self._generate_simulated_weather(state, lat, lon)
+        
+        # Try to fetch real data, fall back to simulated
+        try:
+            return await self._cached_real_weather(lat, lon, task.get("no_cache", False))
+        except Exception as e:
+            self.log_activity("API error, using simulated data: %s", e, level="warning")
+            return self._generate_simulated_weather(state, lat, lon)
+    
+    def _resolve_location(self, task: Dict[str, Any]) -> Tuple[float, float]:
+        """Task coordinates, or the state's from config if not provided."""
         lat = task.get("lat")
         lon = task.get("lon")
-        
-        # Get coordinates from config if not provided
         if not lat or not lon:
-            state_data = config.INDIAN_STATES.get(state, config.INDIAN_STATES["Maharashtra"])
+            state_data = config.INDIAN_STATES.get(task.get("state"), self.DEFAULT_STATE_DATA)
             lat = state_data["lat"]
             lon = state_data["lon"]
+        return lat, lon
+    
+    async def _cached_real_weather(self, lat: float, lon: float, no_cache: bool) -> Dict[str, Any]:
+        """Return live weather for the location, fetching only on a cache miss."""
+        key = (round(lat, 2), round(lon, 2))
+        now = time.monotonic()
+        if not no_cache:
+            entry = self._weather_cache.get(key)
+            if entry is not None and now - entry[0] < self.WEATHER_CACHE_TTL:
+                self._weather_cache.move_to_end(key)
+                return {**entry[1]}
         
-        # Try to fetch real data, fall back to simulated
-        try:
-            if self.api_key != "demo_key":
-                weather_data = await self._fetch_real_weather(lat, lon)
-            else:
-                weather_data = self._generate_simulated_weather(state, lat, lon)
-        except Exception as e:
-            self.log_activity(f"API error, using simulated data: {e}", "warning")
-            weather_data = self._generate_simulated_weather(state, lat, lon)
+        # Concurrent misses for one location share a single upstream fetch.
+        # It runs as its own task (shielded) so a cancelled caller doesn't
+        # cancel it for the others.
+        fetch = self._inflight.get(key)
+        if fetch is None:
+            fetch = asyncio.ensure_future(self._load_weather(key, lat, lon, now, no_cache))
+            self._inflight[key] = fetch
+            fetch.add_done_callback(lambda _: self._inflight.pop(key, None))
+        return {**await asyncio.shield(fetch)}
+    
+    async def _load_weather(self, key: Tuple[float, float], lat: float, lon: float,
+                            now: float, no_cache: bool) -> Dict[str, Any]:
+        """Fill the local cache entry for `key` from the shared cache or the API."""
+        # Second level: weather fetched by other workers
+        shared_key = f"{self.SHARED_CACHE_PREFIX}:{key[0]}:{key[1]}"
+        weather_data = None
+        if self._redis is not None and not no_cache:
+            weather_data = await self._load_shared_weather(shared_key)
         
+        if weather_data is None:
+            weather_data = await self._fetch_real_weather(lat, lon)
+            if self._redis is not None:
+                await self._share_weather(shared_key, weather_data)
+        
+        self._weather_cache[key] = (now, weather_data)
+        self._weather_cache.move_to_end(key)
+        if len(self._weather_cache) > self.WEATHER_CACHE_SIZE:
+            self._weather_cache.popitem(last=False)
         return weather_data
     
+    async def _load_shared_weather(self, shared_key: str) -> Optional[Dict[str, Any]]:
+        """Read weather from the shared cache, or None on a miss or cache error."""
+        try:
+            cached = await self._redis.get(shared_key)
+            return _json_loads(cached) if cached is not None else None
+        except (aioredis.RedisError, ValueError) as e:
+            self.log_activity("Ignoring shared weather cache entry %s: %s", shared_key, e, level="warning")
+            return None
+    
+    async def _share_weather(self, shared_key: str, weather_data: Dict[str, Any]):
+        """Publish weather to the shared cache; failures only cost other workers a fetch."""
+        try:
+            await self._redis.set(shared_key, json.dumps(weather_data), ex=self.WEATHER_CACHE_TTL)
+        except aioredis.RedisError as e:
+            self.log_activity("Could not share weather for %s: %s", shared_key, e, level="warning")
+    
     async def _fetch_real_weather(self, lat: float, lon: float) -> Dict[str, Any]:
         """Fetch real weather data from OpenWeatherMap."""
-        async with httpx.AsyncClient() as client:
-            # Current weather
-            current_url = f"{self.base_url}/weather?lat={lat}&lon={lon}&appid={self.api_key}&units=metric"
-            current_response = await client.get(current_url)
-            current_data = current_response.json()
-            
-            # 5-day forecast
-            forecast_url = f"{self.base_url}/forecast?lat={lat}&lon={lon}&appid={self.api_key}&units=metric"
-            forecast_response = await client.get(forecast_url)
-            forecast_data = forecast_response.json()
-            
-            return self._parse_weather_response(current_data, forecast_data)
+        import httpx  # Already loaded by the client; see _get_client
+        client = self._get_client()
+        location = {"lat": lat, "lon": lon}
+        
+        # Current weather and 5-day forecast are independent; fetch both at once
+        current_response, forecast_response = await asyncio.gather(
+            client.get("/weather", params=location),
+            client.get("/forecast", params={**location, "cnt": self.FORECAST_ENTRIES}),
+            return_exceptions=True
+        )
+        if isinstance(current_response, BaseException):
+            raise current_response
+        # An error body such as {"cod": 429, ...} would parse into default
+        # readings and be cached as live weather; raise so the caller falls
+        # back to simulated data, which is never cached
+        current_response.raise_for_status()
+        current_data = _json_loads(current_response.content)
+        
+        if isinstance(forecast_response, httpx.Response):
+            try:
+                forecast_response.raise_for_status()
+            except httpx.HTTPStatusError as e:
+                forecast_response = e
+        
+        # A failed forecast still leaves usable current conditions
+        if isinstance(forecast_response, httpx.HTTPError):
+            self.log_activity("Forecast request failed, continuing without it: %s", forecast_response,
+                              level="warning")
+            forecast_data = {}
+        elif isinstance(forecast_response, BaseException):
+            raise forecast_response
+        else:
+            forecast_data = _json_loads(forecast_response.content)
+        
+        return self._parse_weather_response(current_data, forecast_data)
     
     def _parse_weather_response(self, current: Dict, forecast: Dict) -> Dict[str, Any]:
         """Parse OpenWeatherMap API response."""
+        main = current.get("main", _EMPTY)
+        rain = current.get("rain", _EMPTY)
         return {
             "current": {
-                "temperature": current.get("main", {}).get("temp", 25),
-                "humidity": current.get("main", {}).get("humidity", 60),
-                "pressure": current.get("main", {}).get("pressure", 1013),
-                "wind_speed": current.get("wind", {}).get("speed", 5),
-                "description": current.get("weather", [{}])[0].get("description", "clear sky"),
-                "clouds": current.get("clouds", {}).get("all", 20)
+                "temperature": main.get("temp", 25),
+                "humidity": main.get("humidity", 60),
+                "pressure": main.get("pressure", 1013),
+                "wind_speed": current.get("wind", _EMPTY).get("speed", 5),
+                "description": current.get("weather", _NO_CONDITIONS)[0].get("description", "clear sky"),
+                "clouds": current.get("clouds", _EMPTY).get("all", 20)
             },
             "rainfall": {
-                "last_1h": current.get("rain", {}).get("1h", 0),
-                "last_3h": current.get("rain", {}).get("3h", 0),
-                "last_24h": sum([f.get("rain", {}).get("3h", 0) for f in forecast.get("list", [])[:8]])
+                "last_1h": rain.get("1h", 0),
+                "last_3h": rain.get("3h", 0),
+                "last_24h": sum([f.get("rain", _EMPTY).get("3h", 0) for f in forecast.get("list", ())[:8]])
             },
             "forecast": self._parse_forecast(forecast),
             "alerts": self._detect_alerts(current),
@@ -101,100 +324,133 @@ class WeatherAgent(BaseAgent):
     def _parse_forecast(self, forecast: Dict) -> list:
         """Parse forecast data."""
         forecasts = []
-        for item in forecast.get("list", [])[:5]:
+        for item in forecast.get("list", ())[:5]:
+            main = item.get("main", _EMPTY)
             forecasts.append({
                 "datetime": item.get("dt_txt"),
-                "temperature": item.get("main", {}).get("temp"),
-                "humidity": item.get("main", {}).get("humidity"),
+                "temperature": main.get("temp"),
+                "humidity": main.get("humidity"),
                 "rain_probability": item.get("pop", 0) * 100,
-                "description": item.get("weather", [{}])[0].get("description")
+                "description": item.get("weather", _NO_CONDITIONS)[0].get("description")
             })
         return forecasts
     
     def _detect_alerts(self, weather: Dict) -> list:
         """Detect weather alerts based on conditions."""
         alerts = []
-        temp = weather.get("main", {}).get("temp", 25)
-        wind = weather.get("wind", {}).get("speed", 5)
-        rain = weather.get("rain", {}).get("1h", 0)
+        temp = weather.get("main", _EMPTY).get("temp", 25)
+        wind = weather.get("wind", _EMPTY).get("speed", 5)
+        rain = weather.get("rain", _EMPTY).get("1h", 0)
         
         if temp > 40:
-            alerts.append({"type": "heat_wave", "severity": "high", "message": "Extreme heat warning"})
+            alerts.append(self.LIVE_ALERTS["heat_wave"])
         if temp < 5:
-            alerts.append({"type": "cold_wave", "severity": "high", "message": "Cold wave warning"})
+            alerts.append(self.LIVE_ALERTS["cold_wave"])
         if wind > 20:
-            alerts.append({"type": "strong_wind", "severity": "medium", "message": "Strong winds expected"})
+            alerts.append(self.LIVE_ALERTS["strong_wind"])
         if rain > 50:
-            alerts.append({"type": "heavy_rain", "severity": "high", "message": "Heavy rainfall warning"})
+            alerts.append(self.LIVE_ALERTS["heavy_rain"])
         
         return alerts
     
     def _generate_simulated_weather(self, state: str, lat: float, lon: float) -> Dict[str, Any]:
         """Generate realistic simulated weather data for Indian conditions."""
-        # Seasonal adjustments based on current month
-        month = datetime.now().month
+        now = datetime.now()
+        draw = iter(_rng.random(self.RANDOM_DRAWS).tolist()).__next__
         
         # Base temperature varies by region and season
-        base_temp = 25 + (lat - 20) * -0.5  # Cooler in north
-        
-        # Seasonal adjustment
-        if month in [3, 4, 5]:  # Summer
-            base_temp += 10
-        elif month in [6, 7, 8, 9]:  # Monsoon
-            base_temp += 5
-        elif month in [11, 12, 1, 2]:  # Winter
-            base_temp -= 5
+        temp_offset, is_monsoon = self.MONTH_CLIMATE[now.month]
+        base_temp = 25 + (lat - 20) * -0.5 + temp_offset  # Cooler in north
         
         # Add some randomness
-        temperature = base_temp + random.uniform(-3, 3)
-        humidity = 60 + random.uniform(-20, 30)
+        temperature = base_temp + (6 * draw() - 3)
+        humidity = 60 + (50 * draw() - 20)
         
         # Monsoon season has more rain
-        is_monsoon = month in [6, 7, 8, 9]
-        rainfall_24h = random.uniform(10, 100) if is_monsoon else random.uniform(0, 20)
+        rainfall_24h = 10 + 90 * draw() if is_monsoon else 20 * draw()
         
         return {
             "current": {
                 "temperature": round(temperature, 1),
-                "humidity": round(humidity, 1),
-                "pressure": round(1013 + random.uniform(-10, 10), 1),
-                "wind_speed": round(random.uniform(2, 15), 1),
-                "description": self._get_weather_description(is_monsoon, temperature),
-                "clouds": random.randint(10, 90)
+                "humidity": round_half_up(humidity, 10),
+                "pressure": round_half_up(1013 + (20 * draw() - 10), 10),
+                "wind_speed": round_half_up(2 + 13 * draw(), 10),
+                "description": self._get_weather_description(is_monsoon, temperature, draw),
+                "clouds": 10 + int(81 * draw())
             },
             "rainfall": {
-                "last_1h": round(rainfall_24h / 24, 1),
-                "last_3h": round(rainfall_24h / 8, 1),
-                "last_24h": round(rainfall_24h, 1)
+                "last_1h": round_half_up(rainfall_24h / 24, 10),
+                "last_3h": round_half_up(rainfall_24h / 8, 10),
+                "last_24h": round_half_up(rainfall_24h, 10)
             },
-            "forecast": self._generate_forecast(temperature, is_monsoon),
+            "forecast": self._generate_forecast(temperature, is_monsoon, now, draw),
             "alerts": self._generate_alerts(temperature, rainfall_24h, is_monsoon),
-            "timestamp": datetime.now().isoformat(),
+            "timestamp": now.isoformat(),
             "data_source": "simulated"
         }
     
-    def _get_weather_description(self, is_monsoon: bool, temp: float) -> str:
+    def simulate_batch(self, tasks: Sequence[Dict[str, Any]]) -> np.ndarray:
+        """
+        Simulate current weather and the daily forecast for many tasks at once.
+        
+        Same model as `_generate_simulated_weather`, with every random value
+        drawn in a few vectorized calls. Text descriptions and alerts are
+        left out.
+        
+        Args:
+            tasks: Sequence of task dicts shaped like `execute` input
+            
+        Returns:
+            Structured array with one BATCH_DTYPE row per task
+        """
+        self._record_execution()
+        n = len(tasks)
+        lat = np.array([self._resolve_location(t)[0] for t in tasks], dtype=np.float64)
+        
+        # The month (and so the season) is shared by the whole batch
+        temp_offset, is_monsoon = self.MONTH_CLIMATE[datetime.now().month]
+        temperature = 25 + (lat - 20) * -0.5 + temp_offset + _rng.uniform(-3, 3, n)
+        rainfall_24h = _rng.uniform(10, 100, n) if is_monsoon else _rng.uniform(0, 20, n)
+        
+        out = np.empty(n, dtype=self.BATCH_DTYPE)
+        np.round(temperature, 1, out=out["temperature"])
+        out["humidity"] = np.round(60 + _rng.uniform(-20, 30, n), 1)
+        out["pressure"] = np.round(1013 + _rng.uniform(-10, 10, n), 1)
+        out["wind_speed"] = np.round(_rng.uniform(2, 15, n), 1)
+        out["clouds"] = _rng.integers(10, 91, n)
+        out["rainfall_24h"] = np.round(rainfall_24h, 1)
+        out["is_monsoon"] = is_monsoon
+        
+        days = (n, self.FORECAST_DAYS)
+        out["forecast_temperature"] = np.round(temperature[:, None] + _rng.uniform(-3, 3, days), 1)
+        out["forecast_humidity"] = np.round(60 + _rng.uniform(-15, 25, days), 1)
+        out["forecast_rain_probability"] = (
+            _rng.integers(60, 96, days) if is_monsoon else _rng.integers(5, 31, days)
+        )
+        return out
+    
+    def _get_weather_description(self, is_monsoon: bool, temp: float, draw: _Draw) -> str:
         """Get weather description based on conditions."""
         if is_monsoon:
-            options = ["light rain", "moderate rain", "heavy rain", "thunderstorm", "overcast clouds"]
+            options = self.MONSOON_DESCRIPTIONS
         elif temp > 35:
-            options = ["clear sky", "few clouds", "haze", "hot and sunny"]
+            options = self.HOT_DESCRIPTIONS
         else:
-            options = ["clear sky", "few clouds", "scattered clouds", "partly cloudy"]
-        return random.choice(options)
+            options = self.FAIR_DESCRIPTIONS
+        return options[int(len(options) * draw())]
     
-    def _generate_forecast(self, current_temp: float, is_monsoon: bool) -> list:
-        """Generate 5-day forecast."""
+    def _generate_forecast(self, current_temp: float, is_monsoon: bool, now: datetime, draw: _Draw) -> list:
+        """Generate the daily forecast starting at `now`."""
         forecasts = []
-        for i in range(5):
-            future_date = datetime.now() + timedelta(days=i)
-            temp_variation = random.uniform(-3, 3)
+        for i in range(self.FORECAST_DAYS):
+            future_date = now + timedelta(days=i)
+            temp_variation = 6 * draw() - 3
             forecasts.append({
-                "datetime": future_date.strftime("%Y-%m-%d %H:%M:%S"),
+                "datetime": future_date.isoformat(" ", "seconds"),  # Same as strftime("%Y-%m-%d %H:%M:%S"), ~3x faster
                 "temperature": round(current_temp + temp_variation, 1),
-                "humidity": round(60 + random.uniform(-15, 25), 1),
-                "rain_probability": random.randint(60, 95) if is_monsoon else random.randint(5, 30),
-                "description": self._get_weather_description(is_monsoon, current_temp + temp_variation)
+                "humidity": round_half_up(60 + (40 * draw() - 15), 10),
+                "rain_probability": 60 + int(36 * draw()) if is_monsoon else 5 + int(26 * draw()),
+                "description": self._get_weather_description(is_monsoon, current_temp + temp_variation, draw)
             })
         return forecasts
     
@@ -203,23 +459,11 @@ class WeatherAgent(BaseAgent):
         alerts = []
         
         if temp > 40:
-            alerts.append({
-                "type": "heat_wave",
-                "severity": "high",
-                "message": "Heat wave conditions expected. Protect crops with shade nets."
-            })
+            alerts.append(self.SIMULATED_ALERTS["heat_wave"])
         
         if rainfall > 80:
-            alerts.append({
-                "type": "flood_risk",
-                "severity": "high",
-                "message": "Heavy rainfall may cause waterlogging. Ensure proper drainage."
-            })
+            alerts.append(self.SIMULATED_ALERTS["flood_risk"])
         elif rainfall > 50 and is_monsoon:
-            alerts.append({
-                "type": "heavy_rain",
-                "severity": "medium",
-                "message": "Moderate to heavy rain expected. Delay pesticide application."
-            })
+            alerts.append(self.SIMULATED_ALERTS["heavy_rain"])
         
         return alerts
@@ -13,10 +13,19 @@ class Config:
     # Database
     DATABASE_PATH = os.getenv("DATABASE_PATH", "cropagent.db")
     
+    # Directory for persisted predictions; empty disables the disk cache
+    PREDICTION_CACHE_DIR = os.getenv("PREDICTION_CACHE_DIR", "")
+    
+    # Redis URL for the weather cache shared across workers; empty disables it
+    REDIS_URL = os.getenv("REDIS_URL", "")
+    
     # Agent Settings
     AGENT_TIMEOUT = int(os.getenv("AGENT_TIMEOUT", "30"))
     MAX_RETRIES = int(os.getenv("MAX_RETRIES", "3"))
     
+    # Server processes started by `python main.py`; each has its own agents and caches
+    API_WORKERS = int(os.getenv("API_WORKERS", "1"))
+    
     # Supported Languages
     SUPPORTED_LANGUAGES = ["en", "hi", "mr"]
     DEFAULT_LANGUAGE = "en"
@@ -187,6 +187,29 @@ CROP_DATABASE = {
 }
 
 
+def _freeze_lists(value: Any) -> Any:
+    """Recursively replace lists with tuples."""
+    if isinstance(value, dict):
+        return {key: _freeze_lists(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return tuple(_freeze_lists(item) for item in value)
+    return value
+
+
+# List fields are stored as tuples, so accessors can share them without
+# copying and callers can't modify them in place
+CROP_DATABASE = _freeze_lists(CROP_DATABASE)
+
+# Crops grown in every season ("both"), also the result for unknown seasons
+_YEAR_ROUND_CROPS = tuple(crop for crop, data in CROP_DATABASE.items() if data.get("season") == "both")
+
+# Season -> its crops plus the year-round ones, in database order
+_CROPS_BY_SEASON = {
+    season: tuple(crop for crop, data in CROP_DATABASE.items() if data.get("season") in (season, "both"))
+    for season in {data.get("season") for data in CROP_DATABASE.values()}
+}
+
+
 def get_crop_info(crop_name: str) -> Optional[Dict[str, Any]]:
     """Get detailed information about a crop."""
     return CROP_DATABASE.get(crop_name)
@@ -197,22 +220,18 @@ def get_all_crops() -> list:
     return list(CROP_DATABASE.keys())
 
 
-def get_crops_by_season(season: str) -> list:
-    """Get crops for a specific season."""
-    season = season.lower()
-    return [
-        crop for crop, data in CROP_DATABASE.items()
-        if data.get("season") == season or data.get("season") == "both"
-    ]
+def get_crops_by_season(season: str) -> tuple:
+    """Get crops for a specific season (a shared, precomputed tuple)."""
+    return _CROPS_BY_SEASON.get(season.lower(), _YEAR_ROUND_CROPS)
 
 
-def get_disease_info(crop_name: str) -> list:
+def get_disease_info(crop_name: str) -> tuple:
     """Get major diseases for a crop."""
     crop = CROP_DATABASE.get(crop_name)
-    return crop.get("major_diseases", []) if crop else []
+    return crop.get("major_diseases", ()) if crop else ()
 
 
-def get_pest_info(crop_name: str) -> list:
+def get_pest_info(crop_name: str) -> tuple:
     """Get major pests for a crop."""
     crop = CROP_DATABASE.get(crop_name)
-    return crop.get("major_pests", []) if crop else []
+    return crop.get("major_pests", ()) if crop else ()
@@ -1,7 +1,9 @@
 """
 Indian Regions Data - Geographic, climate, and agricultural information for Indian states.
 """
-from typing import Dict, Any, Optional
+import math
+from typing import Dict, Any, Optional, Tuple
+import numpy as np
 
 INDIAN_REGIONS = {
     "Maharashtra": {
@@ -187,24 +189,64 @@ INDIAN_REGIONS = {
 }
 
 
+# Mean Earth radius, for converting great-circle angles to kilometres
+EARTH_RADIUS_KM = 6371.0
+
+# Supported state names, in table order
+_ALL_STATES = tuple(INDIAN_REGIONS)
+
+# Season -> state -> crops; any other season gets the state's major crops
+_CROPS_BY_SEASON = {
+    season: {state: tuple(region.get(field, ())) for state, region in INDIAN_REGIONS.items()}
+    for season, field in (("kharif", "kharif_crops"), ("rabi", "rabi_crops"), ("major", "major_crops"))
+}
+
+
+def _unit_vector(lat: float, lon: float) -> Tuple[float, float, float]:
+    """Point on the unit sphere (x, y, z) for a latitude/longitude in degrees."""
+    lat = math.radians(lat)
+    lon = math.radians(lon)
+    cos_lat = math.cos(lat)
+    return (cos_lat * math.cos(lon), cos_lat * math.sin(lon), math.sin(lat))
+
+
+# Every district as (state, district), with its position on the unit sphere
+# in the matching row. The closest district to a point is the row with the
+# largest dot product (smallest great-circle angle).
+_DISTRICT_LABELS = tuple(
+    (state, district) for state, region in INDIAN_REGIONS.items() for district in region["districts"]
+)
+_DISTRICT_VECTORS = np.array([
+    _unit_vector(location["lat"], location["lon"])
+    for location in (INDIAN_REGIONS[state]["districts"][district] for state, district in _DISTRICT_LABELS)
+])
+
+
 def get_region_data(state: str) -> Optional[Dict[str, Any]]:
     """Get detailed data for a specific state."""
     return INDIAN_REGIONS.get(state)
 
 
-def get_all_states() -> list:
-    """Get list of all supported states."""
-    return list(INDIAN_REGIONS.keys())
+def get_all_states() -> tuple:
+    """Get all supported states (a shared, precomputed tuple)."""
+    return _ALL_STATES
+
+
+def get_crops_by_season(state: str, season: str) -> tuple:
+    """Get crops for a state by season (kharif/rabi), as a shared tuple."""
+    by_state = _CROPS_BY_SEASON.get(season.lower(), _CROPS_BY_SEASON["major"])
+    return by_state.get(state, ())
+
+
+def nearest_district(lat: float, lon: float) -> Tuple[str, str]:
+    """Get the (state, district) closest to a point, by great-circle distance."""
+    return _DISTRICT_LABELS[int((_DISTRICT_VECTORS @ np.array(_unit_vector(lat, lon))).argmax())]
 
 
-def get_crops_by_season(state: str, season: str) -> list:
-    """Get crops for a state by season (kharif/rabi)."""
-    region = INDIAN_REGIONS.get(state)
-    if not region:
-        return []
-    
-    if season.lower() == "kharif":
-        return region.get("kharif_crops", [])
-    elif season.lower() == "rabi":
-        return region.get("rabi_crops", [])
-    return region.get("major_crops", [])
+def districts_within(lat: float, lon: float, km: float) -> Tuple[Tuple[str, str], ...]:
+    """Get every (state, district) within `km` great-circle kilometres of a point."""
+    # Within km <=> angle <= km / R <=> dot product >= cos(km / R); one
+    # vectorized pass over all districts instead of a per-district haversine
+    min_dot = math.cos(min(km / EARTH_RADIUS_KM, math.pi))
+    mask = _DISTRICT_VECTORS @ np.array(_unit_vector(lat, lon)) >= min_dot
+    return tuple(label for label, inside in zip(_DISTRICT_LABELS, mask.tolist()) if inside)
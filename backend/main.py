@@ -2,12 +2,18 @@
 CropAgent - Main FastAPI Application
 Agentic AI for Indian Farmers - Crop Area, Yield, and Health Prediction
 """
-from fastapi import FastAPI, HTTPException, WebSocket, WebSocketDisconnect
+from fastapi import BackgroundTasks, FastAPI, HTTPException, Request, Response, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse
 from pydantic import BaseModel
-from typing import Optional, List, Dict, Any
+from typing import Optional, Dict, Any, Set, Tuple
 import asyncio
+import hashlib
+import logging
+import time
 from datetime import datetime
+import orjson
 
 from agents import ManagerAgent
 from memory.memory import memory
@@ -17,7 +23,8 @@ from config import config
 app = FastAPI(
     title="CropAgent API",
     description="Agentic AI for Indian Farmers - Predicts crop area, yield, and health using live data",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse  # orjson encodes the large chat payloads several times faster
 )
 
 # CORS middleware for frontend
@@ -29,11 +36,17 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compress larger bodies (chiefly /api/chat with its raw agent data, ~3x
+# smaller); above level 5 the JSON barely shrinks further
+app.add_middleware(GZipMiddleware, minimum_size=1024, compresslevel=5)
+
 # Initialize Manager Agent
 manager = ManagerAgent()
 
-# WebSocket connections for real-time updates
-active_connections: List[WebSocket] = []
+logger = logging.getLogger("CropAgent.API")
+
+# WebSocket connections for real-time updates (a set, so disconnects are O(1))
+active_connections: Set[WebSocket] = set()
 
 
 # Request/Response Models
@@ -64,34 +77,96 @@ class IrrigationRequest(BaseModel):
     crop: str
 
 
+# Static response bodies, built once at import and shared by every request
+_API_INFO = {
+    "name": "CropAgent API",
+    "version": "1.0.0",
+    "description": "Agentic AI for Indian Farmers",
+    "endpoints": {
+        "chat": "/api/chat",
+        "weather": "/api/weather/{state}",
+        "states": "/api/states",
+        "crops": "/api/crops/{state}",
+        "history": "/api/history",
+        "history_detail": "/api/history/{prediction_id}",
+        "stats": "/api/stats"
+    }
+}
+
+_STATES_PAYLOAD = {
+    "states": [
+        {
+            "name": name,
+            "lat": data["lat"],
+            "lon": data["lon"],
+            "major_crops": data["crops"]
+        }
+        for name, data in config.INDIAN_STATES.items()
+    ]
+}
+
+# Supported state names for path validation
+_VALID_STATES = frozenset(config.INDIAN_STATES)
+
+_CROPS_BY_STATE = {
+    state: {"state": state, "crops": data["crops"]}
+    for state, data in config.INDIAN_STATES.items()
+}
+
+# Static payloads only change on redeploy, so clients and CDNs may reuse them
+STATIC_CACHE_CONTROL = "public, max-age=3600"
+
+
+def _encode_static(payload: Dict[str, Any]) -> Tuple[bytes, str]:
+    """Pre-encode a static payload and derive its strong ETag from the bytes."""
+    body = orjson.dumps(payload)
+    return body, '"%s"' % hashlib.sha256(body).hexdigest()[:32]
+
+
+_API_INFO_BODY = _encode_static(_API_INFO)
+_STATES_BODY = _encode_static(_STATES_PAYLOAD)
+_CROPS_BODY_BY_STATE = {state: _encode_static(payload) for state, payload in _CROPS_BY_STATE.items()}
+
+
+def _static_response(request: Request, encoded: Tuple[bytes, str]) -> Response:
+    """Serve a pre-encoded static body, or 304 Not Modified if the client has it."""
+    body, etag = encoded
+    headers = {"Cache-Control": STATIC_CACHE_CONTROL, "ETag": etag}
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and (if_none_match.strip() == "*" or etag in if_none_match):
+        return Response(status_code=304, headers=headers)
+    return Response(body, media_type="application/json", headers=headers)
+
+
+async def _store_chat_history(query_record: Dict[str, Any], prediction_record: Dict[str, Any]):
+    """
+    Persist a chat exchange once its response has been sent.
+    
+    Both rows are written in one transaction, so the exchange costs a
+    single commit and is never half-stored.
+    """
+    try:
+        await memory.store_chat_exchange(query_record, prediction_record)
+    except Exception as e:
+        logger.warning("Could not store chat history: %s", e)
+
+
 # API Routes
 
 @app.get("/")
-async def root():
+async def root(request: Request):
     """Root endpoint with API info."""
-    return {
-        "name": "CropAgent API",
-        "version": "1.0.0",
-        "description": "Agentic AI for Indian Farmers",
-        "endpoints": {
-            "chat": "/api/chat",
-            "weather": "/api/weather/{state}",
-            "states": "/api/states",
-            "crops": "/api/crops/{state}",
-            "history": "/api/history",
-            "stats": "/api/stats"
-        }
-    }
+    return _static_response(request, _API_INFO_BODY)
 
 
 @app.post("/api/chat", response_model=ChatResponse)
-async def chat(request: ChatRequest):
+async def chat(request: ChatRequest, background_tasks: BackgroundTasks):
     """
     Main chat endpoint - processes farmer queries through the agent system.
     
     Example query: "Will rice yield be good in Maharashtra this season?"
     """
-    start_time = datetime.now()
+    start_ns = time.perf_counter_ns()  # Monotonic, unaffected by clock changes
     
     try:
         # Execute the full agent pipeline
@@ -106,44 +181,55 @@ async def chat(request: ChatRequest):
             raise HTTPException(status_code=500, detail=result.get("error", "Unknown error"))
         
         # Calculate response time
-        response_time_ms = int((datetime.now() - start_time).total_seconds() * 1000)
+        response_time_ms = (time.perf_counter_ns() - start_ns) // 1_000_000
         
-        # Store query in memory
-        await memory.store_query({
-            "query": request.query,
-            "language": request.language,
-            "state": result.get("state"),
-            "crop": result.get("crop"),
-            "response_time_ms": response_time_ms
-        })
+        # Read each result section once for the history records and the response
+        state = result.get("state", "")
+        crop = result.get("crop", "")
+        response = result.get("response", {})
+        raw_data = result.get("raw_data")
+        sections = raw_data or {}
+        prediction = sections.get("prediction", {})
         
-        # Store prediction in memory
-        prediction = result.get("raw_data", {}).get("prediction", {})
-        await memory.store_prediction({
-            "state": result.get("state"),
-            "crop": result.get("crop"),
-            "predicted_yield": prediction.get("yield_prediction", {}).get("predicted", 0),
-            "risk_score": prediction.get("risk_assessment", {}).get("overall_risk_score", 0),
-            "confidence": prediction.get("confidence", {}).get("score", 0),
-            "weather_data": result.get("raw_data", {}).get("weather", {}),
-            "soil_data": result.get("raw_data", {}).get("soil", {}),
-            "satellite_data": result.get("raw_data", {}).get("satellite", {}),
-            "full_response": result.get("response", {})
-        })
+        # Store the query and prediction in memory after responding
+        background_tasks.add_task(
+            _store_chat_history,
+            {
+                "query": request.query,
+                "language": request.language,
+                "state": state,
+                "crop": crop,
+                "response_time_ms": response_time_ms
+            },
+            {
+                "state": state,
+                "crop": crop,
+                "predicted_yield": prediction.get("yield_prediction", {}).get("predicted", 0),
+                "risk_score": prediction.get("risk_assessment", {}).get("overall_risk_score", 0),
+                "confidence": prediction.get("confidence", {}).get("score", 0),
+                "weather_data": sections.get("weather", {}),
+                "soil_data": sections.get("soil", {}),
+                "satellite_data": sections.get("satellite", {}),
+                "full_response": response
+            }
+        )
         
-        return ChatResponse(
-            success=True,
-            query=request.query,
-            state=result.get("state", ""),
-            crop=result.get("crop", ""),
-            language=request.language,
-            response=result.get("response", {}),
-            raw_data=result.get("raw_data"),
-            metadata={
+        # The body is built internally, so it is shaped like ChatResponse
+        # (still the documented response_model) and returned without
+        # re-validating it field by field
+        return ORJSONResponse({
+            "success": True,
+            "query": request.query,
+            "state": state,
+            "crop": crop,
+            "language": request.language,
+            "response": response,
+            "raw_data": raw_data,
+            "metadata": {
                 **result.get("metadata", {}),
                 "response_time_ms": response_time_ms
             }
-        )
+        })
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -152,7 +238,7 @@ async def chat(request: ChatRequest):
 @app.get("/api/weather/{state}")
 async def get_weather(state: str):
     """Get current weather for a state."""
-    if state not in config.INDIAN_STATES:
+    if state not in _VALID_STATES:
         raise HTTPException(status_code=404, detail=f"State '{state}' not found")
     
     weather_data = await manager.get_quick_weather(state)
@@ -166,7 +252,7 @@ async def get_weather(state: str):
 @app.get("/api/soil/{state}/{crop}")
 async def get_soil(state: str, crop: str):
     """Get soil analysis for a state and crop."""
-    if state not in config.INDIAN_STATES:
+    if state not in _VALID_STATES:
         raise HTTPException(status_code=404, detail=f"State '{state}' not found")
     
     soil_data = await manager.get_quick_soil(state, crop)
@@ -179,29 +265,18 @@ async def get_soil(state: str, crop: str):
 
 
 @app.get("/api/states")
-async def get_states():
+async def get_states(request: Request):
     """Get list of supported Indian states."""
-    states = []
-    for name, data in config.INDIAN_STATES.items():
-        states.append({
-            "name": name,
-            "lat": data["lat"],
-            "lon": data["lon"],
-            "major_crops": data["crops"]
-        })
-    return {"states": states}
+    return _static_response(request, _STATES_BODY)
 
 
 @app.get("/api/crops/{state}")
-async def get_crops(state: str):
+async def get_crops(state: str, request: Request):
     """Get major crops for a state."""
-    if state not in config.INDIAN_STATES:
+    encoded = _CROPS_BODY_BY_STATE.get(state)
+    if encoded is None:
         raise HTTPException(status_code=404, detail=f"State '{state}' not found")
-    
-    return {
-        "state": state,
-        "crops": config.INDIAN_STATES[state]["crops"]
-    }
+    return _static_response(request, encoded)
 
 
 @app.get("/api/history")
@@ -214,6 +289,15 @@ async def get_history(state: Optional[str] = None, crop: Optional[str] = None, l
     }
 
 
+@app.get("/api/history/{prediction_id}")
+async def get_history_detail(prediction_id: int):
+    """Get one stored prediction with its full agent data."""
+    prediction = await memory.get_prediction_detail(prediction_id)
+    if prediction is None:
+        raise HTTPException(status_code=404, detail=f"Prediction {prediction_id} not found")
+    return prediction
+
+
 @app.get("/api/stats")
 async def get_stats():
     """Get system statistics."""
@@ -243,7 +327,7 @@ async def get_agent_status():
 async def websocket_endpoint(websocket: WebSocket):
     """WebSocket endpoint for real-time updates."""
     await websocket.accept()
-    active_connections.append(websocket)
+    active_connections.add(websocket)
     
     try:
         while True:
@@ -258,11 +342,11 @@ async def websocket_endpoint(websocket: WebSocket):
                 "crop": data.get("crop")
             })
             
-            # Send response
-            await websocket.send_json(result)
+            # Send response (as JSON text, encoded with orjson like the HTTP routes)
+            await websocket.send_text(orjson.dumps(result).decode())
             
     except WebSocketDisconnect:
-        active_connections.remove(websocket)
+        active_connections.discard(websocket)
 
 
 # Startup and shutdown events
@@ -278,6 +362,8 @@ async def startup_event():
 @app.on_event("shutdown")
 async def shutdown_event():
     """Cleanup on shutdown."""
+    await manager.aclose()
+    await memory.close()
     print("🌾 CropAgent API shutting down...")
 
 
@@ -294,4 +380,7 @@ async def health_check():
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    # The default loop/http ("auto") already run on uvloop and httptools
+    # from uvicorn[standard] where they are installed (uvloop has no Windows
+    # build). Multiple workers need the app as an import string.
+    uvicorn.run("main:app", host="0.0.0.0", port=8000, workers=config.API_WORKERS)
@@ -0,0 +1,51 @@
+"""
+Regression checks for chat history storage through the API.
+
+Run from backend/: python -m unittest discover -s tests
+"""
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.testclient import TestClient
+
+import main
+
+
+class ChatHistoryTests(unittest.TestCase):
+    """Every chat is counted, whether or not it produced a prediction."""
+
+    def setUp(self):
+        # Keep the tests away from the real cropagent.db
+        self._tmp = tempfile.TemporaryDirectory()
+        self._db_path = main.memory.db_path
+        main.memory.db_path = os.path.join(self._tmp.name, "history.db")
+
+    def tearDown(self):
+        main.memory.db_path = self._db_path
+        self._tmp.cleanup()
+
+    def test_chat_without_state_is_counted(self):
+        with TestClient(main.app) as client:
+            response = client.post("/api/chat", json={"query": "hello"})
+            self.assertEqual(response.status_code, 200)
+            self.assertIsNone(response.json()["state"])
+
+            response = client.post("/api/chat", json={
+                "query": "Will rice yield be good this season?",
+                "state": "Maharashtra",
+                "crop": "Rice"
+            })
+            self.assertEqual(response.status_code, 200)
+
+            stats = client.get("/api/stats").json()["query_statistics"]
+            self.assertEqual(stats["total_queries"], 2)
+            # Only the chat with a state and crop has a prediction
+            self.assertEqual(client.get("/api/history").json()["count"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,37 @@
+"""
+Regression checks for the agent pipeline.
+
+Run from backend/: python -m unittest discover -s tests
+"""
+import asyncio
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from agents import ManagerAgent
+
+
+class ManagerAgentQueryTests(unittest.TestCase):
+    """Queries that name no state or crop still get a formatted answer."""
+
+    def _execute(self, query: str):
+        async def run():
+            manager = ManagerAgent()
+            try:
+                return await manager.execute({"query": query, "language": "en"})
+            finally:
+                await manager.aclose()
+        return asyncio.run(run())
+
+    def test_query_without_state_or_crop(self):
+        for query in ("hello", "weather in punjab", "basmati rice"):
+            with self.subTest(query=query):
+                result = self._execute(query)
+                self.assertTrue(result.get("success"), result.get("error"))
+                self.assertIn("summary", result["response"])
+
+
+if __name__ == "__main__":
+    unittest.main()